@@ -0,0 +1,262 @@
+from array import array
+from bisect import bisect_left
+
+from z_algorithm import as_indexable
+
+
+class AhoCorasick:
+    """
+    Multi-pattern exact matching, built once from a pattern set and then run over any number of texts in one pass
+    each. The trie is stored compactly: the children of state s are labels[first[s]:first[s + 1]] (sorted, found
+    by bisection) going to targets at the same positions, alongside flat failure, dictionary link, depth and
+    pattern arrays. Everything is held in arrays so an automaton pickles cheaply for worker processes.
+
+    With skip=True the set is also compiled for a Commentz-Walter style right to left scan (set horspool): a trie
+    of the reversed patterns is walked back from the end of a window and the window then jumps ahead by a bad
+    character shift over the shortest pattern length. That skips most of the text when patterns are long and the
+    alphabet is large, the automaton scan is better for short patterns or small alphabets.
+    """
+    def __init__(self, patterns, skip=False):
+        """
+        :param patterns: an iterable of non empty patterns, all str or all bytes-like, the pattern ids are their
+                         positions in it
+        :param skip: also build the tables for the skip mode scan
+        """
+        patterns = [_tokens(pattern) for pattern in patterns]
+        if not patterns:
+            raise ValueError("need at least one pattern")
+        if not all(patterns):
+            raise ValueError("patterns must not be empty")
+        self.num_patterns = len(patterns)
+
+        children, self.terminal, self.depth, self.duplicate = _build_trie(patterns)
+        self.first, self.labels, self.targets = _compact(children)
+
+        # failure links in breadth first order, a state's link is always shallower than the state
+        num_states = len(children)
+        self.failure = array('i', [0]) * num_states
+        self.dictionary_link = array('i', [-1]) * num_states  # nearest state down the failure chain ending a pattern
+        queue = list(children[0].values())
+        for state in queue:
+            for token, child in children[state].items():
+                fallback = self.failure[state]
+                while True:
+                    target = children[fallback].get(token)
+                    if target is not None or fallback == 0:
+                        break
+                    fallback = self.failure[fallback]
+                link = target if target is not None else 0
+                self.failure[child] = link
+                self.dictionary_link[child] = link if self.terminal[link] >= 0 else self.dictionary_link[link]
+                queue.append(child)
+
+        self.skip = skip
+        if skip:
+            self.shortest = min(len(pattern) for pattern in patterns)
+            reversed_patterns = [pattern[::-1] for pattern in patterns]
+            children, self.reverse_terminal, self.reverse_depth, _ = _build_trie(reversed_patterns)
+            self.reverse_first, self.reverse_labels, self.reverse_targets = _compact(children)
+            # shift[c]: smallest t >= 1 such that some pattern has c at t places from its end, capped at shortest
+            self.shift = {}
+            for pattern in patterns:
+                length = len(pattern)
+                for t in range(min(self.shortest, length) - 1, 0, -1):
+                    token = pattern[length - 1 - t]
+                    if self.shift.get(token, self.shortest) > t:
+                        self.shift[token] = t
+
+    def __repr__(self):
+        return "AhoCorasick(<%d patterns, %d states>)" % (self.num_patterns, len(self.failure))
+
+    def finditer(self, text, skip=None):
+        """
+        :param text: a str, or a bytes-like text when the patterns are bytes
+        :param skip: use the skip mode scan, defaults to whether the automaton was built with skip=True
+        :return: a generator of (pattern_id, offset) for every occurrence of every pattern, in increasing order of
+                 where the occurrence ends, longer patterns first among those ending together
+        """
+        if skip is None:
+            skip = self.skip
+        if skip:
+            if not self.skip:
+                raise ValueError("automaton was built without skip=True")
+            return self._skip_scan(text)
+        return self._automaton_scan(text)
+
+    def findall(self, text, skip=None):
+        """
+        :param text: a str, or a bytes-like text when the patterns are bytes
+        :param skip: use the skip mode scan, defaults to whether the automaton was built with skip=True
+        :return: list of (pattern_id, offset) in the order finditer gives them
+        """
+        return list(self.finditer(text, skip))
+
+    def _automaton_scan(self, text):
+        """
+        The aho-corasick scan, each text character is looked at once
+        :param text: the text
+        :return: a generator of (pattern_id, offset)
+        """
+        first = self.first
+        labels = self.labels
+        targets = self.targets
+        failure = self.failure
+        state = 0
+        for end, token in enumerate(_iter_tokens(text)):
+            while True:
+                lo = first[state]
+                hi = first[state + 1]
+                i = bisect_left(labels, token, lo, hi)
+                if i < hi and labels[i] == token:
+                    state = targets[i]
+                    break
+                if state == 0:
+                    break
+                state = failure[state]
+            if self.terminal[state] >= 0 or self.dictionary_link[state] >= 0:
+                yield from self._report(state, end)
+
+    def _skip_scan(self, text):
+        """
+        The set horspool scan, windows of the shortest pattern length are read right to left
+        :param text: the text
+        :return: a generator of (pattern_id, offset)
+        """
+        first = self.reverse_first
+        labels = self.reverse_labels
+        targets = self.reverse_targets
+        terminal = self.reverse_terminal
+        shift = self.shift
+        shortest = self.shortest
+        tokens = _indexable_tokens(text)
+        end = shortest - 1
+        while end < len(tokens):
+            ended = []  # reversed trie states of the patterns ending at end, shortest first
+            state = 0
+            j = end
+            while j >= 0:
+                token = tokens[j]
+                lo = first[state]
+                hi = first[state + 1]
+                i = bisect_left(labels, token, lo, hi)
+                if i == hi or labels[i] != token:
+                    break
+                state = targets[i]
+                if terminal[state] >= 0:
+                    ended.append(state)
+                j -= 1
+            for state in reversed(ended):
+                pattern_id = terminal[state]
+                while pattern_id >= 0:
+                    yield pattern_id, end - self.reverse_depth[state] + 1
+                    pattern_id = self.duplicate[pattern_id]
+            end += shift.get(tokens[end], shortest)
+
+    def _report(self, state, end):
+        """
+        Every pattern ending at state or down its dictionary links
+        :param state: the automaton state after reading text[end]
+        :param end: index in the text of the last character read
+        :return: a generator of (pattern_id, offset)
+        """
+        terminal = self.terminal
+        depth = self.depth
+        dictionary_link = self.dictionary_link
+        if terminal[state] < 0:
+            state = dictionary_link[state]
+        while state >= 0:
+            pattern_id = terminal[state]
+            while pattern_id >= 0:
+                yield pattern_id, end - depth[state] + 1
+                pattern_id = self.duplicate[pattern_id]
+            state = dictionary_link[state]
+
+
+def multi_pattern_search(text, patterns, skip=False):
+    """
+    Finds every occurrence of every pattern in text in one pass
+    :param text: a str, or a bytes-like text when the patterns are bytes
+    :param patterns: an iterable of non empty patterns
+    :param skip: use the Commentz-Walter style skip scan
+    :return: list of (pattern_id, offset), pattern_id being the pattern's position in patterns
+    """
+    return AhoCorasick(patterns, skip).findall(text)
+
+
+def _build_trie(patterns):
+    """
+    :param patterns: list of non empty token lists
+    :return: (children, terminal, depth, duplicate) where children is a list of dictionaries token -> state,
+             terminal[s] the lowest id of the patterns spelled by state s or -1, depth[s] the length of s and
+             duplicate[id] the next id of an identical pattern or -1
+    """
+    children = [{}]
+    terminal = array('i', [-1])
+    depth = array('i', [0])
+    duplicate = array('i', [-1]) * len(patterns)
+    last_duplicate = {}  # state -> highest pattern id spelled by it so far
+    for pattern_id, pattern in enumerate(patterns):
+        state = 0
+        for token in pattern:
+            child = children[state].get(token)
+            if child is None:
+                child = children[state][token] = len(children)
+                children.append({})
+                terminal.append(-1)
+                depth.append(depth[state] + 1)
+            state = child
+        if terminal[state] < 0:
+            terminal[state] = pattern_id
+        else:
+            duplicate[last_duplicate[state]] = pattern_id
+        last_duplicate[state] = pattern_id
+    return children, terminal, depth, duplicate
+
+
+def _compact(children):
+    """
+    Flattens the trie's child dictionaries into sorted parallel arrays
+    :param children: list of dictionaries token -> state
+    :return: (first, labels, targets), the children of s are at first[s]:first[s + 1]
+    """
+    first = array('i', [0]) * (len(children) + 1)
+    labels = array('L')
+    targets = array('i')
+    for state, edges in enumerate(children):
+        for token in sorted(edges):
+            labels.append(token)
+            targets.append(edges[token])
+        first[state + 1] = len(labels)
+    return first, labels, targets
+
+
+def _tokens(sequence):
+    """
+    :param sequence: a str or bytes-like sequence
+    :return: list of non negative ints, one per character
+    """
+    if isinstance(sequence, str):
+        return list(map(ord, sequence))
+    return list(as_indexable(sequence))
+
+
+def _iter_tokens(text):
+    """
+    :param text: a str or bytes-like text
+    :return: an iterator over the ints of text without copying it
+    """
+    if isinstance(text, str):
+        return map(ord, text)
+    return iter(as_indexable(text))
+
+
+def _indexable_tokens(text):
+    """
+    :param text: a str or bytes-like text
+    :return: a sequence of the ints of text, a zero copy view unless text is a str
+    """
+    if isinstance(text, str):
+        tokens = array('I')
+        tokens.frombytes(text.encode('utf-32-le'))
+        return tokens
+    return as_indexable(text)
@@ -0,0 +1,220 @@
+from array import array
+
+from z_algorithm import as_indexable
+
+
+BLOCK_SIZE = 1 << 16  # text positions indexed at once, bounds memory and lets results stream
+
+
+class LCEIndex:
+    """
+    Longest common extension queries in O(1) between positions of a pattern and a text.
+    Built from the suffix array of pattern + sentinel + text, its LCP array (Kasai) and a sparse table for range
+    minimum queries over the LCP array.
+    """
+    def __init__(self, pattern, text):
+        """
+        :param pattern: a str or bytes-like pattern
+        :param text: a str or bytes-like text, the same kind as pattern
+        """
+        self.m = len(pattern)
+        tokens = _tokens(pattern)
+        tokens.append(-1)  # the two sentinels are unique, so no extension runs past the end of pattern or text
+        tokens.extend(_tokens(text))
+        tokens.append(-2)
+        self.tokens = tokens
+        self.suffix_array = suffix_array(tokens)
+        self.rank = array('i', [0]) * len(tokens)
+        for position, suffix in enumerate(self.suffix_array):
+            self.rank[suffix] = position
+        self.lcp = lcp_array(tokens, self.suffix_array, self.rank)
+
+        # sparse[level][i] = min(lcp[i : i + 2^level])
+        self.sparse = [self.lcp]
+        width = 1
+        while 2 * width <= len(self.lcp):
+            previous = self.sparse[-1]
+            self.sparse.append(array('i', map(min, previous[:len(previous) - width], previous[width:])))
+            width *= 2
+
+    def extension(self, i, j):
+        """
+        Length of the longest common prefix of tokens[i:] and tokens[j:]
+        :param i: a position in the combined token sequence
+        :param j: a position in the combined token sequence
+        :return: the lce length
+        """
+        if i == j:
+            return len(self.tokens) - i
+        a = self.rank[i]
+        b = self.rank[j]
+        if a > b:
+            a, b = b, a
+        # min of lcp[a+1 .. b], covered by two overlapping power of two ranges
+        level = (b - a).bit_length() - 1
+        table = self.sparse[level]
+        return min(table[a + 1], table[b - (1 << level) + 1])
+
+    def pattern_text(self, pattern_position, text_position):
+        """
+        LCE between pattern[pattern_position:] and text[text_position:]
+        :param pattern_position: index into the pattern
+        :param text_position: index into the text
+        :return: the number of matching characters before the first mismatch or the end of either
+        """
+        return self.extension(pattern_position, self.m + 1 + text_position)
+
+
+def k_mismatch_search(text, pattern, k, block_size=BLOCK_SIZE):
+    """
+    Finds every alignment of pattern in text with at most k mismatching characters (hamming distance).
+    Each alignment costs at most k + 1 O(1) LCE jumps (kangaroo method), O(nk) overall.
+    :param text: a str or bytes-like text
+    :param pattern: a non empty pattern of the same kind
+    :param k: most mismatches allowed
+    :param block_size: text positions handled per LCE index
+    :return: a generator of (offset, mismatches) in increasing offset
+    """
+    m = len(pattern)
+    if m == 0:
+        raise ValueError("pattern must not be empty")
+    text = as_indexable(text)
+    n = len(text)
+    for block_start in range(0, max(n - m + 1, 0), block_size):
+        block_end = min(block_start + block_size, n - m + 1)  # alignments starting in this block
+        index = LCEIndex(pattern, text[block_start:block_end + m - 1])
+        lce = index.pattern_text
+        for offset in range(block_end - block_start):
+            j = 0
+            mismatches = 0
+            while True:
+                j += lce(j, offset + j)
+                if j >= m:
+                    break
+                mismatches += 1
+                if mismatches > k:
+                    break
+                j += 1  # jump over the mismatch
+                if j >= m:
+                    break
+            if mismatches <= k:
+                yield block_start + offset, mismatches
+
+
+def k_difference_search(text, pattern, k, block_size=BLOCK_SIZE):
+    """
+    Finds where pattern occurs in text with at most k differences (substitutions, insertions and deletions),
+    using the Landau-Vishkin diagonal method with O(1) LCE jumps, O(nk) overall.
+    :param text: a str or bytes-like text
+    :param pattern: a non empty pattern of the same kind
+    :param k: most differences allowed
+    :param block_size: text positions handled per LCE index
+    :return: a generator of (end, differences) in increasing end, where end is the text index of the last
+             character of the occurrence and differences is the fewest edits of any occurrence ending there
+    """
+    m = len(pattern)
+    if m == 0:
+        raise ValueError("pattern must not be empty")
+    text = as_indexable(text)
+    n = len(text)
+    for block_start in range(0, n, block_size):
+        block_end = min(block_start + block_size, n)  # report occurrences ending in this block
+        window_start = max(0, block_start - m - k)  # an occurrence spans at most m + k characters
+        window = text[window_start:block_end]
+        best = {}
+        for end, differences in _landau_vishkin(LCEIndex(pattern, window), m, len(window), k):
+            end += window_start
+            if end >= block_start and (end not in best or differences < best[end]):
+                best[end] = differences
+        for end in sorted(best):
+            yield end, best[end]
+
+
+def _landau_vishkin(index, m, n, k):
+    """
+    Landau-Vishkin over one window. L[d] is the furthest pattern row reached on diagonal d (text column = row + d)
+    with e differences, extended each round by an LCE jump.
+    :param index: LCEIndex of the pattern and window
+    :param m: pattern length
+    :param n: window length
+    :param k: most differences allowed
+    :return: a generator of (end in window, differences), possibly several per end
+    """
+    lce = index.pattern_text
+    previous = {}  # diagonal -> row for e - 1 differences
+    for e in range(k + 1):
+        current = {}
+        for d in range(-e, n + 1):
+            row = max(-d, 0)  # a fresh start at text column d, or the first -d pattern characters all missing
+            if e > 0:
+                row = max(row,
+                          previous.get(d, -2) + 1,  # substitution
+                          previous.get(d - 1, -1),  # extra text character
+                          previous.get(d + 1, -2) + 1)  # pattern character missing from the text
+                row = min(row, m, n - d)
+            if row < m and row + d < n:
+                row += lce(row, row + d)
+            current[d] = row
+            if row == m:
+                yield m + d - 1, e
+        previous = current
+
+
+def suffix_array(tokens):
+    """
+    Suffix array by prefix doubling
+    :param tokens: a list of ints
+    :return: array('i') of the suffix start positions in sorted order
+    """
+    n = len(tokens)
+    order = sorted(range(n), key=tokens.__getitem__)
+    rank = [0] * n
+    for position in range(1, n):
+        previous, suffix = order[position - 1], order[position]
+        rank[suffix] = rank[previous] + (tokens[suffix] != tokens[previous])
+
+    width = 1
+    while n and rank[order[-1]] < n - 1:  # stop once every suffix has its own rank
+        # sort on (rank of the first width tokens, rank of the next width tokens) packed in one int
+        keys = [rank[i] * (n + 1) + (rank[i + width] + 1 if i + width < n else 0) for i in range(n)]
+        order.sort(key=keys.__getitem__)
+        rank = [0] * n
+        for position in range(1, n):
+            previous, suffix = order[position - 1], order[position]
+            rank[suffix] = rank[previous] + (keys[suffix] != keys[previous])
+        width *= 2
+    return array('i', order)
+
+
+def lcp_array(tokens, suffixes, rank):
+    """
+    Kasai's algorithm, lcp[i] is the common prefix length of the suffixes at suffixes[i-1] and suffixes[i]
+    :param tokens: a list of ints
+    :param suffixes: the suffix array of tokens
+    :param rank: the inverse of suffixes
+    :return: array('i') with lcp[0] = 0
+    """
+    n = len(tokens)
+    lcp = array('i', [0]) * n
+    h = 0
+    for i in range(n):
+        if rank[i] > 0:
+            j = suffixes[rank[i] - 1]
+            while i + h < n and j + h < n and tokens[i + h] == tokens[j + h]:
+                h += 1
+            lcp[rank[i]] = h
+            if h > 0:
+                h -= 1
+        else:
+            h = 0
+    return lcp
+
+
+def _tokens(sequence):
+    """
+    :param sequence: a str or bytes-like sequence
+    :return: list of non negative ints, one per character
+    """
+    if isinstance(sequence, str):
+        return list(map(ord, sequence))
+    return list(as_indexable(sequence))
@@ -0,0 +1,178 @@
+from array import array
+from multiprocessing import Pool, shared_memory
+import os
+
+from kruskals_algorithm import compact_vertices, disjoint_set, load_edges
+
+
+PARALLEL_THRESHOLD = 100000  # below this many edges the pool costs more than it saves
+
+_shared = {}  # per worker process: the shared memory blocks and the arrays viewed from them
+
+
+def boruvka_mst(graph_text, processes=None):
+    """
+    Finds the minimum spanning tree with Boruvka's algorithm, sharding the edges across a process pool
+    If the graph is disconnected the minimum spanning forest is returned instead
+    :param graph_text: text or binary document of a network
+    :param processes: number of worker processes, defaults to the number of cores
+    :return: the list of edges that form the mst
+    """
+    u, v, weights = load_edges(graph_text)
+    return boruvka_arrays(u, v, weights, processes)
+
+
+def boruvka_arrays(u, v, weights, processes=None):
+    """
+    Boruvka's algorithm on an edge list held as three parallel arrays.
+    Each round every shard finds the cheapest edge leaving each component, the shards are merged and all those
+    edges are unioned. Ties are broken on edge index, so the tree is the same one kruskal_arrays picks.
+
+    :param u: array of the first vertex of each edge
+    :param v: array of the second vertex of each edge
+    :param weights: array of the edge weights
+    :param processes: number of worker processes, defaults to the number of cores
+    :return: the list of edges [u, v, weight] that form the mst, in the order kruskal would add them
+    """
+    labels, dense_u, dense_v = compact_vertices(u, v)
+    n = len(labels)
+    vertex_set = disjoint_set(n)
+    num_edges = len(u)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or num_edges < PARALLEL_THRESHOLD:
+        component = array(vertex_set.parent_array.typecode, [0]) * vertex_set.size
+
+        def find_cheapest(shards):
+            return [_cheapest_edges(dense_u, dense_v, weights, component, start, stop) for start, stop in shards]
+
+        return _boruvka_rounds(vertex_set, n, u, v, dense_u, dense_v, weights, component, find_cheapest,
+                               [(0, num_edges)])
+
+    blocks = []
+    shared_arrays = []
+    try:
+        component = array(vertex_set.parent_array.typecode, [0]) * vertex_set.size  # same type as find_many
+        for typed in (dense_u, dense_v, _typed_array(weights), component):
+            block = shared_memory.SharedMemory(create=True, size=max(1, len(typed)) * typed.itemsize)
+            blocks.append(block)
+            view = block.buf.cast('B').cast(typed.typecode)[:len(typed)]
+            view[:] = typed
+            shared_arrays.append(view)
+        component = shared_arrays[3]
+        layout = [(block.name, view.format, len(view)) for block, view in zip(blocks, shared_arrays)]
+
+        step = max(1, -(-num_edges // (4 * processes)))
+        shards = [(start, min(start + step, num_edges)) for start in range(0, num_edges, step)]
+        with Pool(processes, initializer=_attach_shared, initargs=(layout,)) as pool:
+            return _boruvka_rounds(vertex_set, n, u, v, dense_u, dense_v, weights, component,
+                                   lambda bounds: pool.map(_shard_worker, bounds), shards)
+    finally:
+        for view in shared_arrays:
+            view.release()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def _boruvka_rounds(vertex_set, n, u, v, dense_u, dense_v, weights, component, find_cheapest, shards):
+    """
+    Runs Boruvka rounds until the tree is complete or no edge leaves any component
+    :param vertex_set: the disjoint_set over the renumbered vertices
+    :param n: number of vertices
+    :param u: array of the first vertex of each edge
+    :param v: array of the second vertex of each edge
+    :param dense_u: u renumbered by compact_vertices
+    :param dense_v: v renumbered by compact_vertices
+    :param weights: array of the edge weights
+    :param component: writable array the current component of every vertex is stored in
+    :param find_cheapest: maps a list of shard bounds to a list of {component: (weight, edge index)} dicts
+    :param shards: list of (start, stop) edge ranges
+    :return: the list of edges [u, v, weight] that form the mst
+    """
+    chosen = []
+    num_unions = 0
+    while num_unions < n - 1:
+        component[:] = vertex_set.find_many(range(vertex_set.size))
+
+        cheapest = {}
+        for shard_best in find_cheapest(shards):
+            for comp, key in shard_best.items():
+                best = cheapest.get(comp)
+                if best is None or key < best:
+                    cheapest[comp] = key
+        if not cheapest:  # nothing leaves any component, so the graph is disconnected
+            break
+
+        for key in cheapest.values():
+            i = key[1]
+            if vertex_set.union_by_rank(dense_u[i], dense_v[i]):  # False when both ends picked the same edge
+                chosen.append(key)
+                num_unions += 1
+
+    chosen.sort()
+    return [[u[i], v[i], weights[i]] for _, i in chosen]
+
+
+def _cheapest_edges(u, v, weights, component, start, stop):
+    """
+    Finds the cheapest edge leaving each component among the edges start..stop-1
+    :param u: array of the first (renumbered) vertex of each edge
+    :param v: array of the second (renumbered) vertex of each edge
+    :param weights: array of the edge weights
+    :param component: the component of every vertex
+    :param start: first edge index of the shard
+    :param stop: one past the last edge index of the shard
+    :return: dictionary from component to (weight, edge index) of its cheapest outgoing edge
+    """
+    best = {}
+    for i in range(start, stop):
+        comp_u = component[u[i]]
+        comp_v = component[v[i]]
+        if comp_u == comp_v:  # edge is inside a component
+            continue
+        key = (weights[i], i)
+        current = best.get(comp_u)
+        if current is None or key < current:
+            best[comp_u] = key
+        current = best.get(comp_v)
+        if current is None or key < current:
+            best[comp_v] = key
+    return best
+
+
+def _typed_array(values):
+    """
+    Gets an int64 array of values, or a double array if they aren't all ints
+    :param values: a sequence of numbers
+    :return: array('q') or array('d')
+    """
+    if isinstance(values, array) and values.typecode in 'qd':
+        return values
+    try:
+        return array('q', values)
+    except TypeError:
+        return array('d', values)
+
+
+def _attach_shared(layout):
+    """
+    Pool initializer, attaches the worker to the shared edge and component arrays
+    :param layout: list of (shared memory name, typecode, length) for u, v, weights and component
+    :return: None
+    """
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in layout]
+    _shared['blocks'] = blocks
+    _shared['arrays'] = [block.buf.cast('B').cast(typecode)[:length]
+                         for block, (_, typecode, length) in zip(blocks, layout)]
+
+
+def _shard_worker(bounds):
+    """
+    Cheapest outgoing edges for one shard, run inside a pool worker
+    :param bounds: (start, stop) edge range of the shard
+    :return: dictionary from component to (weight, edge index)
+    """
+    u, v, weights, component = _shared['arrays']
+    return _cheapest_edges(u, v, weights, component, bounds[0], bounds[1])
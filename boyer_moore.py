@@ -1,93 +1,208 @@
-def boyer_moore(text, pattern):
-    """
-    The boyer moore string match algorithm
-    Assumes the strings contain only ascii characters
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+import mmap
+from multiprocessing import Pool, shared_memory
+import os
 
-    :param pattern:  a string of length m
-    :param text: a string of length n >= m
-    :return: matches a set of indexes where matches occur
-    """
+from z_algorithm import z_algorithm, z_values  # z_algorithm used to live here, re-exported for old callers
 
 
-    # preprocess pattern
-    # check for matchs
-    # find length of jump with bad character
-    # find length with good suffix
-    # Shift with best
+CACHE_SIZE = 4096  # compiled patterns kept by compile()
+PARALLEL_THRESHOLD = 1 << 20  # below this many characters the pool costs more than it saves
 
-    preprop = preprocess(pattern)
-    bc_shift = preprop[0]
-    gs_shift = preprop[1]
+_shared = {}  # per worker process: the text view and matcher used by parallel_search
 
-    matches = set()
 
-    index = 0
-    while (index + len(pattern)) <= len(text):
-        k = len(pattern) - 1
-        is_match = True
-        while k >= 0:
-            if pattern[k] != text[index + k]:
-                # determine max shift from bad character rule and good suffix rule
-                # BC rule
-                char_index = ord(text[index+ k])
-                most_left_occ = bc_shift[k][char_index]
+def boyer_moore(text, pattern):
+    """
+    The boyer moore string match algorithm, with the strong good suffix rule and Galil's rule so the worst case
+    is O(n + m) even on periodic text
+    Works on any str, or on bytes when text and pattern are both bytes-like
 
-                if most_left_occ == -1:
-                    bc_shift_amount = k + 1
-                else:
-                    bc_shift_amount = k - most_left_occ
+    :param pattern:  a non empty string of length m
+    :param text: a string of length n >= m
+    :return: a generator of the indexes where matches occur, in increasing order
+    """
+    preprop = preprocess(pattern)
+    return _search(text, pattern, preprop[0], preprop[1], preprop[2])
 
-                if gs_shift[k-1]>0:
-                    gs_shift_amount = len(pattern) - gs_shift[k-1]
-                else:
-                    gs_shift_amount = 1
 
+def _search(text, pattern, bc_shift, gs_shift, mp_shift, start=0):
+    """
+    The boyer moore scan over already preprocessed pattern tables
+    :param text: a string of length n
+    :param pattern: a non empty string of length m
+    :param bc_shift: bad character table from preprocess_bad_character
+    :param gs_shift: good suffix array from good_suffix
+    :param mp_shift: matched prefix array from matched_prefix
+    :param start: index in text to start looking from
+    :return: a generator of the match indexes in increasing order
+    """
+    m = len(pattern)
+    n = len(text)
+    period_shift = m - mp_shift[1] if m > 1 else 1  # shift after a match, the pattern's period
+
+    end = start + m - 1  # text index the last pattern character is aligned with
+    known_end = -1  # Galil's rule: text up to here is known to match the start of the pattern
+    while end < n:
+        k = m - 1
+        h = end
+        while k >= 0 and h > known_end and pattern[k] == text[h]:
+            k -= 1
+            h -= 1
+
+        if k < 0 or h == known_end:  # reached the start of the pattern or the part already known to match
+            yield end - m + 1
+            # the pattern's border now lies over text we just matched, so next time stop comparing there
+            known_end = end
+            end += period_shift
+        else:
+            # determine max shift from bad character rule and good suffix rule
+            bc_shift_amount = bad_character_shift(bc_shift, k, text[h])
+            if k == m - 1:  # no good suffix yet
+                gs_shift_amount = 1
+            elif gs_shift[k + 1] >= 0:  # the matched suffix occurs again, preceded by a different character
+                gs_shift_amount = m - 1 - gs_shift[k + 1]
+            else:  # otherwise line up the longest prefix that is also a suffix of the matched part
+                gs_shift_amount = m - mp_shift[k + 1]
+            known_end = -1
+            end += max(1, gs_shift_amount, bc_shift_amount)
+
+
+class BoyerMoorePattern:
+    """
+    A pattern preprocessed once for boyer moore, made by compile(). Immutable, so one instance can be shared by
+    every caller that compiles the same pattern.
+    """
+    __slots__ = ('pattern', 'bc_table', 'gs_array', 'mp_array')
+
+    def __init__(self, pattern):
+        """
+        :param pattern: a non empty str or bytes pattern
+        """
+        if len(pattern) == 0:
+            raise ValueError("pattern must not be empty")
+        preprop = preprocess(pattern)
+        object.__setattr__(self, 'pattern', pattern)
+        object.__setattr__(self, 'bc_table', preprop[0])
+        object.__setattr__(self, 'gs_array', preprop[1])
+        object.__setattr__(self, 'mp_array', preprop[2])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("BoyerMoorePattern is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("BoyerMoorePattern is immutable")
+
+    def __repr__(self):
+        return "BoyerMoorePattern(%r)" % (self.pattern,)
+
+    def __reduce__(self):
+        # __setattr__ blocks the default unpickling, so rebuild through the cache instead, e.g. in a worker process
+        return compile, (self.pattern,)
+
+    def finditer(self, text, start=0):
+        """
+        :param text: the text to search
+        :param start: index in text to start looking from
+        :return: a generator of every match index in increasing order, overlapping matches included
+        """
+        return _search(text, self.pattern, self.bc_table, self.gs_array, self.mp_array, start)
+
+    def search(self, text, start=0):
+        """
+        :param text: the text to search
+        :param start: index in text to start looking from
+        :return: the index of the first match, or None if there isn't one
+        """
+        return next(self.finditer(text, start), None)
+
+    def count(self, text):
+        """
+        :param text: the text to search
+        :return: the number of matches, overlapping matches included
+        """
+        return sum(1 for _ in self.finditer(text))
+
+    def search_many(self, texts):
+        """
+        :param texts: an iterable of texts
+        :return: a list with the index of the first match in each text, None where there is no match
+        """
+        return [self.search(text) for text in texts]
+
+
+def compile(pattern):
+    """
+    Gets the preprocessed BoyerMoorePattern for pattern, in the style of re.compile.
+    The last CACHE_SIZE patterns are kept in an lru cache, see cache_stats.
+    :param pattern: a non empty str or bytes-like pattern
+    :return: a BoyerMoorePattern
+    """
+    if not isinstance(pattern, (str, bytes)):
+        pattern = bytes(pattern)  # bytearray and memoryview aren't hashable
+    return _compile(pattern)
 
-                shift_amount = max(1, gs_shift_amount, bc_shift_amount)
-                index += shift_amount
 
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile(pattern):
+    """
+    :param pattern: a non empty str or bytes pattern
+    :return: a new BoyerMoorePattern, cached by compile()
+    """
+    return BoyerMoorePattern(pattern)
 
-                is_match = False
-                break
-            else:
-                k -= 1
 
-        if is_match:
-            matches.add(index)
-            index += 1
+def cache_stats():
+    """
+    Statistics of the compile() cache, e.g. for exporting to metrics
+    :return: dictionary with hits, misses, maxsize and currsize
+    """
+    return _compile.cache_info()._asdict()
 
-    return matches
 
+def clear_cache():
+    """
+    Empties the compile() cache and resets its statistics
+    :return: None
+    """
+    _compile.cache_clear()
 
 
-def preprocess2D(pattern):
+def preprocess_bad_character(pattern):
     """
-
-    alphabet = ascii
-    Table is length of pattern * 128. First index is position of pattern, next is location of letter
+    Bad character table sized to the pattern's own alphabet, works for any str (full unicode) or bytes pattern.
+    For each character that occurs in the pattern the table holds the sorted positions it occurs at, so the
+    rightmost occurrence left of a mismatch is found by bisection. O(m + sigma) time and memory.
 
     :param pattern: the pattern to be analysed
-    :return:  Bad character shift table
+    :return: dictionary from character (an int for bytes) to array('i') of its positions in the pattern
     """
+    locations = {}
+    for k, char in enumerate(pattern):
+        positions = locations.get(char)
+        if positions is None:
+            positions = locations[char] = array('i')
+        positions.append(k)
+    return locations
 
-    locations = [None]*len(pattern)  #Length of ascii
-    for k in range(len(pattern)):
-        locations[k] = [-1] * 128
-
-
-
-    #set first character
-    index = ord(pattern[0])
-    locations[0][index] = 0
 
-    #Now do the rest of the rows
-    for k in range(1,len(pattern)):
-        for i in range(128):
-            if pattern[k] == chr(i):
-                locations[k][i] = k
-            else:
-                locations[k][i] = locations[k-1][i]
-    return locations
+def bad_character_shift(bc_table, k, char):
+    """
+    Shift given by the bad character rule
+    :param bc_table: table from preprocess_bad_character
+    :param k: position in the pattern of the mismatch
+    :param char: the text character that mismatched
+    :return: how far the pattern can move so its rightmost char left of k lines up with the text char
+    """
+    positions = bc_table.get(char)
+    if positions is None:  # char isn't in the pattern so move past it
+        return k + 1
+    i = bisect_left(positions, k)
+    if i == 0:
+        return k + 1
+    return k - positions[i - 1]
 
 
 
@@ -97,122 +212,194 @@ def preprocess(pattern):
 
     """
     All preprocessing for boyer-moore
-    :param pattern:
-    :return:
+    :param pattern: a non empty string
+    :return: [bad character table, good suffix array, matched prefix array]
     """
-
-    bc_table = preprocess2D(pattern)
-    gc_array = good_suffix(pattern)
-    return [bc_table, gc_array]
+    if len(pattern) == 0:
+        raise ValueError("pattern must not be empty")
+    bc_table = preprocess_bad_character(pattern)
+    gs_array = good_suffix(pattern)
+    mp_array = matched_prefix(pattern)
+    return [bc_table, gs_array, mp_array]
 
 
 def good_suffix(pattern):
     """
-    Computes the good suffix of
+    Computes the strong good suffix array from the z-values of the reversed pattern.
+    N[j], the longest suffix of pattern[:j+1] that is also a suffix of pattern, is the reversed z-array. Each N[j]
+    marks j as the rightmost end of another copy of the suffix of that length whose preceding character differs.
+
     :param pattern: the string to compute good suffix
-    :return: Array of good suffix
+    :return: array gs where gs[i] is the end of the rightmost such copy of pattern[i:], or -1 if there is none
     """
-
-    rev_pattern = ''
-    for i in range(len(pattern)):
-        rev_pattern += pattern[i]
-    reversed(rev_pattern)
-    z_suffix_array = z_algorithm(rev_pattern)
-    reversed(z_suffix_array)
-
-    gs_array = [0]*len(pattern)
-    for p in range(len(pattern) - 2):
-        j = len(pattern)-1 - (gs_array[p])
-        gs_array[j] = p
-
+    m = len(pattern)
+    z_suffix_array = z_values(pattern[::-1])
+
+    gs_array = array('i', [-1]) * (m + 1)
+    for j in range(m - 1):
+        suffix_length = z_suffix_array[m - 1 - j]  # N[j]
+        if suffix_length > 0:
+            gs_array[m - suffix_length] = j
     return gs_array
 
 
-def partition(string):
+def matched_prefix(pattern):
     """
-    A function to partition string into 2 pieces
+    Computes the matched prefix array from the z-values of the pattern
+    :param pattern: a non empty string
+    :return: array mp where mp[i] is the length of the longest suffix of pattern[i:] that is a prefix of pattern
+    """
+    m = len(pattern)
+    z_array = z_values(pattern)
+    mp_array = array('i', [0]) * (m + 1)
+    longest = 0
+    for i in range(m - 1, -1, -1):
+        if z_array[i] == m - i:  # pattern[i:] is itself a prefix
+            longest = m - i
+        mp_array[i] = longest
+    return mp_array
+
+
+def partition(string, parts=2, overlap=0):
+    """
+    A function to partition string into pieces by slicing, so str, bytes, memoryview and mmap are all cheap to split
 
     :param string: a string
+    :param parts: number of pieces
+    :param overlap: how many characters each piece also takes from the start of the next one
     :return: An array with partitions of string
     """
-    n = len(string)
-    center = math.floor(n/2)
-    part1 = ""
-    for i in range(center):
-        part1 += string[i]
-    part2 = ""
-    for i in range(center, n):
-        part2 += string[i]
-
-    return [part1, part2]
-
-
-
-def z_algorithm(pattern):
-    """
-    :param string: a string to compute the z_values assumed longer than 2
-    :return: z_values of string
-    """
-    string = pattern
-    if len(string) <= 1:
-        return[1]
-
-    #first Z2
-    z_array = [0]* len(string)
-    z_array[0] = None
-
-    r = 0
-    l = 0
-    i = 0
-    while string[i] == string[1+i]:
-        i += 1
-        if i+1 >= len(string):
-            break
-
-    if i > 0:
-        z_array[1] = i
-        l = 1
-        r = i
-
-    k = 2
-    while k < len(string):
-        if k > r:
-            i = 0
-            while string[i] == string[i + k]:
-                i += 1
-                if i+k >= len(string):
-                    break
-
-            z_array[k] = i
-            if i > 0:
-                l = k
-                r = k + i - 1
-
-        elif k <= r:    #we are in the z-box
-            if z_array[k-l] < r - k + 1:
-                z_array[k] = z_array[k-l]
-
-            else:# z_array[k-l] >= r - k + 1
-                if r+1 < len(string):       #We can look for letters after with z_box
-                    i = 0
-                    while string[r - k + i + 1] == string[r + i + 1]:
-                        i += 1
-                        if i + r + 1 >= len(string):
-                            break
-
-                    #we have i matches after
-                    if i > 0:
-                        z_array[k] = r - k + 1 + i
-                        l = k
-                        r = r + i
-                    else:
-                        z_array[k] = r - k + 1
-
-                else: #we have to have that z_array[k] = r-k+1
-                    z_array[k] = r-k+1
-
-        k += 1
-    return z_array
+    return [string[start:stop] for start, stop in partition_ranges(len(string), parts, overlap)]
+
+
+def partition_ranges(n, parts, overlap=0):
+    """
+    Splits [0, n) into parts nearly equal ranges, each extended overlap past its end (but not past n).
+    With overlap = m - 1 every match of a length m pattern lies wholly inside the range its start falls in, and no
+    range can contain a match that starts in the next one, so searching each range finds every match exactly once.
+
+    :param n: length of the string
+    :param parts: number of ranges
+    :param overlap: how far each range runs into the next one
+    :return: list of (start, stop)
+    """
+    if parts < 1:
+        raise ValueError("parts must be positive")
+    bounds = [i * n // parts for i in range(parts + 1)]
+    return [(bounds[i], min(bounds[i + 1] + overlap, n)) for i in range(parts)]
+
+
+def parallel_search(text, pattern, processes=None):
+    """
+    Boyer moore over a process pool. The text is copied once into shared memory, split into overlapping ranges
+    with partition_ranges and each worker searches zero copy views of its ranges.
+
+    :param text: a str, or a bytes-like text with a bytes pattern
+    :param pattern: a non empty pattern of the same kind as text
+    :param processes: number of worker processes, defaults to the number of cores
+    :return: list of the indexes where matches occur, in increasing order
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or len(text) < PARALLEL_THRESHOLD:
+        return list(compile(pattern).finditer(text))
+
+    if isinstance(text, str):
+        # utf-32 gives every character one 4 byte slot, so indexes stay character indexes
+        data = text.encode('utf-32-le')
+        typecode = 'I'
+    else:
+        data = text
+        typecode = 'B'
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    try:
+        block.buf[:len(data)] = data
+        del data
+        return _search_ranges(('shared', block.name, typecode, len(text)), pattern, len(text), processes)
+    finally:
+        block.close()
+        block.unlink()
+
+
+def parallel_search_file(input_text, pattern, processes=None, encoding="utf-8"):
+    """
+    Like search_file, but splits the file into overlapping ranges searched by a process pool. Each worker memory
+    maps the file itself, so nothing is read into this process or sent to the workers but the offsets.
+
+    :param input_text: path of the file to search
+    :param pattern: a non empty str or bytes pattern, str patterns are encoded with encoding
+    :param processes: number of worker processes, defaults to the number of cores
+    :param encoding: encoding used for a str pattern
+    :return: list of the byte offsets of the matches, in increasing order
+    """
+    if isinstance(pattern, str):
+        pattern = pattern.encode(encoding)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    n = os.path.getsize(input_text)
+    if processes <= 1 or n < PARALLEL_THRESHOLD:
+        return list(search_file(input_text, pattern))
+    return _search_ranges(('file', input_text), pattern, n, processes)
+
+
+def _search_ranges(source, pattern, n, processes):
+    """
+    Runs the range workers over source and merges their offsets
+    :param source: where workers find the text, see _attach_text
+    :param pattern: a non empty pattern
+    :param n: length of the text
+    :param processes: number of worker processes
+    :return: list of the match indexes in increasing order
+    """
+    m = len(pattern)
+    if m == 0:
+        raise ValueError("pattern must not be empty")
+    ranges = partition_ranges(n, 4 * processes, m - 1)  # a few ranges per worker to balance the load
+    with Pool(processes, initializer=_attach_text, initargs=(source, pattern)) as pool:
+        found = pool.map(_range_worker, ranges)
+    # ranges come back in order and each holds its matches in order, so merging is a concatenation
+    matches = []
+    for offsets in found:
+        for index in offsets:
+            if not matches or index > matches[-1]:  # ranges own disjoint starts, this just guards the merge
+                matches.append(index)
+    return matches
+
+
+def _attach_text(source, pattern):
+    """
+    Pool initializer, gives the worker a view of the text and the preprocessed pattern
+    :param source: ('shared', shared memory name, typecode, length) or ('file', path)
+    :param pattern: the pattern, a str pattern is searched for in the utf-32 code points of the text
+    :return: None
+    """
+    if source[0] == 'file':
+        with open(source[1], 'rb') as text:
+            mapped = mmap.mmap(text.fileno(), 0, access=mmap.ACCESS_READ)
+        _shared['handle'] = mapped
+        _shared['text'] = memoryview(mapped)
+    else:
+        _, name, typecode, length = source
+        block = shared_memory.SharedMemory(name=name)
+        _shared['handle'] = block
+        _shared['text'] = block.buf.cast('B').cast(typecode)[:length]
+    if isinstance(pattern, str):
+        pattern = array('I', map(ord, pattern))
+    _shared['matcher'] = BoyerMoorePattern(pattern)
+
+
+def _range_worker(bounds):
+    """
+    Searches one range of the shared text, run inside a pool worker
+    :param bounds: (start, stop) from partition_ranges
+    :return: list of the match indexes in the whole text
+    """
+    start, stop = bounds
+    window = _shared['text'][start:stop]
+    try:
+        return [start + index for index in _shared['matcher'].finditer(window)]
+    finally:
+        window.release()
 
 
 def process_text(input_text):
@@ -237,3 +424,45 @@ def process_pattern(input_pattern):
     pattern_string = pattern.read()
     pattern.close()
     return pattern_string
+
+
+def search_file(input_text, pattern, chunk_size=None, encoding="utf-8"):
+    """
+    Searches a file for pattern without reading it all into memory, yielding matches as soon as they are found.
+    By default the file is memory mapped and scanned in place. With chunk_size it is instead read chunk_size
+    bytes at a time, each chunk prefixed with the last m-1 bytes of the one before so no match is missed.
+
+    :param input_text: path of the file to search
+    :param pattern: a non empty str or bytes pattern, str patterns are encoded with encoding
+    :param chunk_size: None to memory map the file, otherwise how many bytes to read at a time
+    :param encoding: encoding used for a str pattern
+    :return: a generator of the byte offsets of the matches, in increasing order
+    """
+    if isinstance(pattern, str):
+        pattern = pattern.encode(encoding)
+    matcher = compile(pattern)
+    m = len(pattern)
+
+    with open(input_text, 'rb') as text:
+        if chunk_size is None:
+            if os.fstat(text.fileno()).st_size < m:  # also covers empty files, which can't be mapped
+                return
+            with mmap.mmap(text.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from matcher.finditer(mapped)
+            return
+
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        base = 0  # file offset of buffer[0]
+        buffer = b""
+        while True:
+            chunk = text.read(chunk_size)
+            if not chunk:
+                return
+            buffer += chunk
+            for index in matcher.finditer(buffer):
+                yield base + index
+            # a match starting in the kept tail must end in the next chunk, so it was not reported yet
+            keep = min(m - 1, len(buffer))
+            base += len(buffer) - keep
+            buffer = buffer[len(buffer) - keep:]
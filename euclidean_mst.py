@@ -0,0 +1,179 @@
+from array import array
+import math
+
+from kruskals_algorithm import disjoint_set
+
+
+LEAF_SIZE = 16  # most points a kd-tree leaf holds before it is split
+
+
+def euclidean_mst(points, leaf_size=LEAF_SIZE):
+    """
+    Finds the minimum spanning tree of the complete graph on points with euclidean edge weights, without making
+    that graph. Runs Boruvka rounds where every point asks a kd-tree for its nearest neighbour in another
+    component, so only O(n) candidate edges are ever fed into the disjoint set.
+
+    :param points: an (n, d) sequence of coordinates, e.g. a list of tuples or a numpy array
+    :param leaf_size: most points held in a kd-tree leaf
+    :return: the list of edges [i, j, distance] that form the mst, i and j are indexes into points, in weight order
+    """
+    if hasattr(points, 'tolist'):
+        points = points.tolist()
+    points = [tuple(map(float, point)) for point in points]
+    n = len(points)
+    tree = KDTree(points, leaf_size)
+    vertex_set = disjoint_set(n)
+    component = array('q', range(n))
+    nearest = [None] * n  # (squared distance, index) of the nearest foreign point, valid while it stays foreign
+
+    chosen = []
+    num_unions = 0
+    while num_unions < n-1:
+        tree.label_components(component)
+
+        cheapest = {}
+        for i in range(n):
+            comp = component[i]
+            if nearest[i] is None or component[nearest[i][1]] == comp:
+                nearest[i] = tree.nearest_foreign(i, comp)
+            d2, j = nearest[i]
+            key = (d2, i, j) if i < j else (d2, j, i)  # a total order on edges so ties can't make cycles
+            best = cheapest.get(comp)
+            if best is None or key < best:
+                cheapest[comp] = key
+
+        for key in cheapest.values():
+            if vertex_set.union_by_rank(key[1], key[2]):  # False when both ends picked the same edge
+                chosen.append(key)
+                num_unions += 1
+
+        find = vertex_set.find_with_PC
+        for i in range(n):
+            component[i] = find(i)
+
+    chosen.sort()
+    return [[i, j, math.sqrt(d2)] for d2, i, j in chosen]
+
+
+class KDTree:
+    """
+    kd-tree over a fixed list of points that answers "nearest point outside my component" queries.
+    Nodes are stored in parallel lists indexed by node number, children always have bigger numbers than their parent.
+    """
+    def __init__(self, points, leaf_size=LEAF_SIZE):
+        """
+        :param points: a list of coordinate tuples, all the same length
+        :param leaf_size: most points held in a leaf
+        """
+        self.points = points
+        self.dims = len(points[0]) if points else 0
+        self.order = list(range(len(points)))  # point indexes, each node owns the slice order[start:end]
+        self.start = []
+        self.end = []
+        self.left = []  # child node numbers, -1 for a leaf
+        self.right = []
+        self.low = []  # bounding box corners
+        self.high = []
+        self.node_component = []  # component shared by every point in the node, or -1 if they differ
+        self._component = None  # component of every point, set by label_components
+        if points:
+            self._build(0, len(points), leaf_size)
+
+    def _build(self, start, end, leaf_size):
+        """
+        Builds the subtree over order[start:end], splitting on the widest dimension at the median
+        :param start: first position in order
+        :param end: one past the last position in order
+        :param leaf_size: most points held in a leaf
+        :return: the node number of the subtree root
+        """
+        node = len(self.start)
+        members = self.order[start:end]
+        low = tuple(min(self.points[i][d] for i in members) for d in range(self.dims))
+        high = tuple(max(self.points[i][d] for i in members) for d in range(self.dims))
+        self.start.append(start)
+        self.end.append(end)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.low.append(low)
+        self.high.append(high)
+        self.node_component.append(-1)
+
+        if end - start > leaf_size:
+            axis = max(range(self.dims), key=lambda d: high[d] - low[d])
+            members.sort(key=lambda i: self.points[i][axis])
+            self.order[start:end] = members
+            middle = (start + end) // 2
+            self.left[node] = self._build(start, middle, leaf_size)
+            self.right[node] = self._build(middle, end, leaf_size)
+        return node
+
+    def label_components(self, component):
+        """
+        Records which nodes hold points of a single component, so queries can skip them whole
+        :param component: the component of every point
+        :return: None
+        """
+        self._component = component
+        for node in range(len(self.start) - 1, -1, -1):  # children before parents
+            if self.left[node] == -1:
+                comps = {component[i] for i in self.order[self.start[node]:self.end[node]]}
+                self.node_component[node] = comps.pop() if len(comps) == 1 else -1
+            else:
+                left_comp = self.node_component[self.left[node]]
+                same = left_comp == self.node_component[self.right[node]]
+                self.node_component[node] = left_comp if same else -1
+
+    def nearest_foreign(self, i, comp):
+        """
+        Finds the nearest point to point i whose component isn't comp. Ties go to the smaller index.
+        :param i: index of the query point
+        :param comp: the component of point i, as last given to label_components
+        :return: (squared distance, index) of the nearest foreign point, or None if every point is in comp
+        """
+        query = self.points[i]
+        points = self.points
+        order = self.order
+        node_component = self.node_component
+        best = None
+        best_d2 = math.inf
+        stack = [0] if self.start else []
+        while stack:
+            node = stack.pop()
+            if node_component[node] == comp or self._box_distance(query, node) > best_d2:
+                continue
+            left = self.left[node]
+            if left == -1:
+                for j in order[self.start[node]:self.end[node]]:
+                    if node_component[node] == -1 and self._component[j] == comp:
+                        continue
+                    d2 = sum((a - b) * (a - b) for a, b in zip(query, points[j]))
+                    if d2 < best_d2 or (d2 == best_d2 and j < best):
+                        best_d2 = d2
+                        best = j
+            else:
+                right = self.right[node]
+                # visit the closer child first so the bound tightens sooner
+                if self._box_distance(query, left) <= self._box_distance(query, right):
+                    stack.append(right)
+                    stack.append(left)
+                else:
+                    stack.append(left)
+                    stack.append(right)
+        if best is None:
+            return None
+        return best_d2, best
+
+    def _box_distance(self, query, node):
+        """
+        :param query: a coordinate tuple
+        :param node: a node number
+        :return: squared distance from query to the bounding box of node
+        """
+        total = 0.0
+        for x, low, high in zip(query, self.low[node], self.high[node]):
+            if x < low:
+                total += (low - x) * (low - x)
+            elif x > high:
+                total += (x - high) * (x - high)
+        return total
@@ -0,0 +1,98 @@
+from math import gcd
+from multiprocessing import Pool
+import os
+import random
+
+from miller_rabin import SMALL_PRIMES, is_prime
+
+
+GCD_BATCH = 128  # rho steps multiplied together between gcds
+PARALLEL_THRESHOLD = 64  # fewer numbers than this are factored in this process
+
+
+def factorize(n):
+    """
+    Factors n into primes. Trial division by SMALL_PRIMES first, then Pollard-Brent rho splits what is left,
+    with is_prime from miller_rabin deciding when a cofactor is prime
+    :param n: a positive integer
+    :return: list of the prime factors of n with multiplicity, in increasing order
+    """
+    if n < 1:
+        raise ValueError("can only factor positive integers")
+    factors = []
+    for p in SMALL_PRIMES:
+        if p * p > n:
+            break
+        while n % p == 0:
+            factors.append(p)
+            n //= p
+
+    composites = [n] if n > 1 else []
+    while composites:
+        m = composites.pop()
+        if is_prime(m):
+            factors.append(m)
+        else:
+            d = pollard_brent(m)
+            composites.append(d)
+            composites.append(m // d)
+
+    factors.sort()
+    return factors
+
+
+def factorize_many(numbers, processes=None):
+    """
+    Factors every number in numbers, spread over a process pool
+    :param numbers: an iterable of positive integers
+    :param processes: number of worker processes, defaults to the number of cores
+    :return: a list with the factorize result of each number, in order
+    """
+    numbers = [int(n) for n in numbers]
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or len(numbers) < PARALLEL_THRESHOLD:
+        return [factorize(n) for n in numbers]
+    with Pool(processes) as pool:
+        return pool.map(factorize, numbers, chunksize=max(1, len(numbers) // (8 * processes)))
+
+
+def pollard_brent(n, seed=None):
+    """
+    Finds a non trivial factor of a composite n with Brent's variant of Pollard's rho.
+    The differences are multiplied together GCD_BATCH at a time so only one gcd is taken per batch.
+    :param n: a composite integer
+    :param seed: optional seed for the random starting point and polynomial
+    :return: a factor d of n with 1 < d < n
+    """
+    if n % 2 == 0:
+        return 2
+    rng = random.Random(seed)
+    while True:
+        y = rng.randrange(1, n)
+        c = rng.randrange(1, n)  # iterate y -> y^2 + c mod n
+        g = 1
+        r = 1
+        q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                saved_y = y  # start of this batch, in case the batched gcd overshoots to n
+                for _ in range(min(GCD_BATCH, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = gcd(q, n)
+                k += GCD_BATCH
+            r *= 2
+
+        if g == n:  # the batch overshot, step through it one gcd at a time
+            g = 1
+            while g == 1:
+                saved_y = (saved_y * saved_y + c) % n
+                g = gcd(abs(x - saved_y), n)
+        if g != n:
+            return g
+        # otherwise this polynomial cycled without splitting n, try another one
@@ -1,40 +1,271 @@
 import random as ran
+from array import array
+import heapq
+import mmap
 from operator import itemgetter
+import os
 import sys
+import tempfile
 
 
-def kruskal_mst(graph_text):
+BINARY_MAGIC = b"KRUSKAL\x01"  # first 8 bytes of a binary edge file, followed by little endian int64 u, v, weight triples
+BINARY_MAGIC_UNSIGNED = b"KRUSKAL\x02"  # the same with u and v as uint64, for ids of 2**63 and up such as 64 bit hashes
+CHUNK_SIZE = 1 << 24  # bytes of text parsed per chunk by the loader
+MERGE_FAN_IN = 64  # most sorted runs external_kruskal_mst merges at once, each one holds an open file
+
+
+def kruskal_mst(graph_text, sort_mode="auto", engine="kruskal", processes=None):
     """
     implements kruskals algorithm to find the minumum spanning tree
-    :param graph_text: text document of a network
+    If the graph is disconnected the minimum spanning forest is returned instead
+    :param graph_text: text or binary document of a network
+    :param sort_mode: how edges are put in weight order, see sorted_edges
+    :param engine: "kruskal" for the sequential algorithm, "boruvka" for the parallel one in boruvka_algorithm
+                   or "external" to sort the edges on disk, see external_kruskal_mst
+    :param processes: number of worker processes for the "boruvka" engine, defaults to the number of cores
     :return: the list of edges that form the mst
     """
-    graph_process = process_input(graph_text)
-    edge_list = graph_process[1] #lsit of edges
-    vertices = graph_process[0] #set of all vertices
+    if engine == "external":
+        return external_kruskal_mst(graph_text)
+    u, v, weights = load_edges(graph_text)
+    if engine == "kruskal":
+        return kruskal_arrays(u, v, weights, sort_mode)
+    elif engine == "boruvka":
+        from boruvka_algorithm import boruvka_arrays  # imported here as boruvka_algorithm imports this module
+        return boruvka_arrays(u, v, weights, processes)
+    else:
+        raise ValueError("unknown engine " + repr(engine))
+
+
+def kruskal_arrays(u, v, weights, sort_mode="auto"):
+    """
+    kruskals algorithm on an edge list held as three parallel arrays
+    :param u: array of the first vertex of each edge
+    :param v: array of the second vertex of each edge
+    :param weights: array of the edge weights
+    :param sort_mode: how edges are put in weight order, see sorted_edges
+    :return: the list of edges [u, v, weight] that form the mst
+    """
+    labels, dense_u, dense_v = compact_vertices(u, v) #vertices renumbered 0..n-1
     spanning_tree_edges = []
 
-
-    vertex_set = disjoint_set(vertices)  #create disjoint set
-    edge_list.sort(key=lambda x: x[2]) #Sort our edge list based on weight
+    vertex_set = disjoint_set(len(labels))  #create disjoint set
 
     num_unions = 0
-    n = len(vertices)
-    while num_unions < n-1: #After n-1 unions all vertices are included in the mst
-        next_edge = edge_list.pop(0) #Get the edge with smallest weight
-        v = next_edge[0]
-        u = next_edge[1]
-
-        if vertex_set.find_with_PC(v) != vertex_set.find_with_PC(u):#If edge doesn't create a cycle
-            spanning_tree_edges.append(next_edge)
-            vertex_set.union_by_rank(v, u)
+    n = len(labels)
+    for i in sorted_edge_order(weights, sort_mode): #Edges come out smallest weight first
+        if num_unions >= n-1: #After n-1 unions all vertices are included in the mst
+            break
+
+        if vertex_set.union_by_rank(dense_u[i], dense_v[i]):#If edge doesn't create a cycle
+            spanning_tree_edges.append([u[i], v[i], weights[i]])
             num_unions += 1
+        #Otherwise we've encountered an edge that will create a cycle so we do nothing
 
     #output_MST(spanning_tree_edges)
     return spanning_tree_edges
 
-        #Otherwise we've encountered an edge that will create a cycle so we do nothing
 
+def compact_vertices(u, v):
+    """
+    Renumbers arbitrary hashable vertex ids to 0..n-1 in order of first appearance, so the disjoint set only needs
+    one entry per distinct vertex however big or sparse the ids are
+    :param u: sequence of the first vertex of each edge
+    :param v: sequence of the second vertex of each edge
+    :return: a tuple (labels, dense_u, dense_v), labels[i] is the original id of vertex i and dense_u/dense_v are
+             array('q') of the renumbered edges
+    """
+    index = {}
+    add = index.setdefault
+    dense_u = array('q', [add(a, len(index)) for a in _as_int_list(u)])
+    dense_v = array('q', [add(b, len(index)) for b in _as_int_list(v)])
+    return list(index), dense_u, dense_v
+
+
+def sorted_edges(edge_list, mode="auto"):
+    """
+    Yields the edges of edge_list in non-decreasing weight, see sorted_edge_order for the modes
+    :param edge_list: a list of edges [u, v, weight]
+    :param mode: how the edges are ordered
+    :return: a generator over the edges
+    """
+    for i in sorted_edge_order([edge[2] for edge in edge_list], mode):
+        yield edge_list[i]
+
+
+def sorted_edge_order(weights, mode="auto"):
+    """
+    Yields edge indexes in non-decreasing weight. Edges with equal weight keep their input order.
+    Modes:
+        "sort"     - one timsort keyed on the weight
+        "counting" - bucket the edges by weight, integer weights only
+        "heap"     - heapify once and pop lazily, so a consumer that stops early only pays for what it used
+        "auto"     - counting when the weights are integers over a small range, sort otherwise
+
+    :param weights: a sequence with the weight of each edge
+    :param mode: one of the modes above
+    :return: a generator over the edge indexes
+    """
+    if mode == "auto":
+        mode = "counting" if _small_int_range(weights) else "sort"
+
+    if mode == "sort":
+        yield from sorted(range(len(weights)), key=weights.__getitem__)
+    elif mode == "counting":
+        yield from _counting_sort_order(weights)
+    elif mode == "heap":
+        # the index breaks ties so equal weights come out in input order
+        heap = list(zip(weights, range(len(weights))))
+        heapq.heapify(heap)
+        while heap:
+            yield heapq.heappop(heap)[1]
+    else:
+        raise ValueError("unknown sort mode " + repr(mode))
+
+
+def _small_int_range(weights):
+    """
+    Checks if counting sort is worthwhile, i.e. all weights are ints and there are not many more buckets than edges
+    :param weights: a sequence with the weight of each edge
+    :return: True if the counting sort should be used
+    """
+    if len(weights) == 0:
+        return False
+    if not (isinstance(weights, array) and weights.typecode in "bBhHiIlLqQ"):
+        if not all(type(w) is int for w in weights):
+            return False
+    return max(weights) - min(weights) <= 4 * len(weights)
+
+
+def _counting_sort_order(weights):
+    """
+    Stable counting sort of the edges on their integer weight
+    :param weights: a sequence with the int weight of each edge
+    :return: a list of the edge indexes in non-decreasing weight
+    """
+    if len(weights) == 0:
+        return []
+    low = min(weights)
+    buckets = [[] for _ in range(max(weights) - low + 1)]
+    for i, w in enumerate(weights):
+        buckets[w - low].append(i)
+    return [i for bucket in buckets for i in bucket]
+
+
+
+def external_kruskal_mst(graph_text, run_size=CHUNK_SIZE, temp_dir=None):
+    """
+    Kruskals algorithm for edge files bigger than memory.
+    The file is read run_size bytes at a time, each piece is sorted by weight and written to disk as a binary run,
+    then the runs are k-way merged as one stream into the disjoint set. Reading stops after n-1 unions.
+    With more than MERGE_FAN_IN runs, groups of them are first merged into longer runs until few enough are left.
+    Vertices are renumbered 0..n-1 as they are read, like compact_vertices does, so the runs hold any ids.
+    Only the vertex ids, the disjoint set and one run are held in memory at once.
+
+    :param graph_text: text or binary document of a network
+    :param run_size: roughly how many bytes of the input go into each sorted run
+    :param temp_dir: directory for the run files, defaults to the system temp directory
+    :return: the list of edges that form the mst
+    """
+    index = {}  # vertex id -> dense number
+    add = index.setdefault
+    spanning_tree_edges = []
+    with tempfile.TemporaryDirectory(dir=temp_dir) as run_dir:
+        run_paths = []
+        for u, v, weights in iter_edge_chunks(graph_text, run_size):
+            if not _fits(weights, 'q'):
+                raise ValueError("the external engine needs weights that fit in int64")
+            dense_u = [add(a, len(index)) for a in _as_int_list(u)]
+            dense_v = [add(b, len(index)) for b in _as_int_list(v)]
+            order = sorted(range(len(weights)), key=weights.__getitem__)  # stable, so equal weights keep file order
+            run_path = os.path.join(run_dir, "run%d.bin" % len(run_paths))
+            with open(run_path, 'wb') as run:
+                run.write(BINARY_MAGIC)
+                _write_edge_records(run, array('q', [dense_u[i] for i in order]),
+                                    array('q', [dense_v[i] for i in order]), array('q', [weights[i] for i in order]))
+            run_paths.append(run_path)
+
+        labels = list(index)
+        del index, add
+        n = len(labels)
+        vertex_set = disjoint_set(n)
+
+        # split the read buffer between the runs so merging takes about as much memory as one run
+        buffer_size = max(1 << 16, run_size // min(MERGE_FAN_IN, max(1, len(run_paths))))
+        num_runs = len(run_paths)
+        while len(run_paths) > MERGE_FAN_IN:  # consecutive groups, so equal weights still come out in file order
+            merged_paths = []
+            for start in range(0, len(run_paths), MERGE_FAN_IN):
+                merged_path = os.path.join(run_dir, "run%d.bin" % num_runs)
+                num_runs += 1
+                _merge_runs(run_paths[start:start + MERGE_FAN_IN], merged_path, buffer_size)
+                merged_paths.append(merged_path)
+            run_paths = merged_paths
+
+        runs = [_read_run(run_path, buffer_size) for run_path in run_paths]
+        try:
+            num_unions = 0
+            for next_edge in heapq.merge(*runs, key=itemgetter(2)):  # ties come from the earlier run first
+                if num_unions >= n-1: #After n-1 unions all vertices are included in the mst
+                    break
+                if vertex_set.union_by_rank(next_edge[0], next_edge[1]):
+                    spanning_tree_edges.append([labels[next_edge[0]], labels[next_edge[1]], next_edge[2]])
+                    num_unions += 1
+        finally:
+            for run in runs:
+                run.close()
+
+    return spanning_tree_edges
+
+
+def _merge_runs(run_paths, merged_path, buffer_size):
+    """
+    Merges sorted runs into one run and deletes them
+    :param run_paths: paths of the runs, equal weights are taken from earlier runs first
+    :param merged_path: where to write the merged run
+    :param buffer_size: roughly how many bytes are read from each run and written at once
+    :return: None
+    """
+    batch_size = max(1, buffer_size // (3 * array('q').itemsize))
+    runs = [_read_run(run_path, buffer_size) for run_path in run_paths]
+    try:
+        with open(merged_path, 'wb') as merged:
+            merged.write(BINARY_MAGIC)
+            batch = []
+            for edge in heapq.merge(*runs, key=itemgetter(2)):
+                batch.append(edge)
+                if len(batch) == batch_size:
+                    _write_edge_records(merged, *zip(*batch))
+                    batch = []
+            if batch:
+                _write_edge_records(merged, *zip(*batch))
+    finally:
+        for run in runs:
+            run.close()
+    for run_path in run_paths:
+        os.remove(run_path)
+
+
+def _read_run(path, buffer_size):
+    """
+    Streams the edges of a run one at a time. Runs are read with plain file reads rather than iter_edge_chunks,
+    which would hold a memory map as well as a file descriptor open for each of the runs being merged.
+    :param path: path to a binary edge file with int64 records
+    :param buffer_size: roughly how many bytes are read at once
+    :return: a generator of (u, v, weight) tuples
+    """
+    record = 3 * array('q').itemsize
+    step = max(1, buffer_size // record) * record
+    with open(path, 'rb') as run:
+        if run.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError("not a run file: " + path)
+        while True:
+            data = run.read(step)
+            if not data:
+                return
+            if len(data) % record != 0:
+                raise ValueError("run file is truncated: " + path)
+            yield from zip(*_decode_records(data, False))
 
 
 def process_input(text):
@@ -44,24 +275,224 @@ def process_input(text):
     :param text: the input text containing our graph
     :return: a tuple with the set of vertices in position 0 and a list of edges in position 1
     """
-    vertex_set = set()  #A set to store all the vertices we encounter in the graph
-    edge_list = []     #The list of all the edges
-    graph_text = open(text, 'r')
+    u, v, weights = load_edges(text)
+    vertex_set = set(u)  #A set to store all the vertices we encounter in the graph
+    vertex_set.update(v)
+    edge_list = [list(edge) for edge in zip(u, v, weights)]     #The list of all the edges
 
-    for line in graph_text:
-        edge = line.split(" ")
+    return [vertex_set, edge_list]
 
-        for i in range(3):  #This just converts each thing in edge to an integer instead of a string
-            edge[i] = int(edge[i])
 
-        if not vertex_set.__contains__(edge[0]):#If we find a new vertex add it to the set
-            vertex_set.add(edge[0])
-        if not vertex_set.__contains__(edge[1]):
-            vertex_set.add(edge[1])
-        edge_list.append(edge)
-    graph_text.close()
+def load_edges(path, chunk_size=CHUNK_SIZE):
+    """
+    Loads a whole edge file, text or binary, into three parallel typed arrays
+    :param path: path to the edge file
+    :param chunk_size: bytes of text parsed at a time
+    :return: a tuple (u, v, weights), each an array('q'), or an array('Q') or list of ints if its values don't fit
+    """
+    u = array('q')
+    v = array('q')
+    weights = array('q')
+    for chunk_u, chunk_v, chunk_w in iter_edge_chunks(path, chunk_size):
+        u = _extend_column(u, chunk_u)
+        v = _extend_column(v, chunk_v)
+        weights = _extend_column(weights, chunk_w)
+    return u, v, weights
 
-    return [vertex_set, edge_list]
+
+def _extend_column(column, values):
+    """
+    Appends values to a column of load_edges, widening it from array('q') to array('Q') or to a list of ints when
+    they don't fit. Widening copies the column, which happens at most twice per load.
+    :param column: array('q'), array('Q') or list
+    :param values: array or list of ints to append
+    :return: the column, a new object if it had to be widened
+    """
+    if isinstance(column, list):
+        column.extend(values)
+        return column
+    if isinstance(values, array) and values.typecode == column.typecode:
+        column.extend(values)
+        return column
+    if len(values) == 0:
+        return column
+    if _fits(values, column.typecode):  # checked first, as a failed extend leaves some values appended
+        column.extend(array(column.typecode, values))
+        return column
+    if _fits(values, 'Q') and _fits(column, 'Q'):
+        widened = array('Q', column)
+        widened.extend(array('Q', values))
+        return widened
+    widened = column.tolist()
+    widened.extend(values)
+    return widened
+
+
+def _typed(values, typecode):
+    """
+    :param values: array or list of ints that fit in typecode
+    :param typecode: 'q' or 'Q'
+    :return: values as an array of typecode, not copied if it already is one
+    """
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    return array(typecode, values)
+
+
+def _fits(values, typecode):
+    """
+    :param values: a sequence of ints
+    :param typecode: 'q' or 'Q'
+    :return: True if every value fits in an array of typecode
+    """
+    if isinstance(values, array) and values.typecode == typecode or len(values) == 0:
+        return True
+    if typecode == 'q':
+        return -2**63 <= min(values) and max(values) < 2**63
+    return 0 <= min(values) and max(values) < 2**64
+
+
+def iter_edge_chunks(path, chunk_size=CHUNK_SIZE):
+    """
+    Memory maps an edge file and parses it a chunk at a time.
+    Text files have one "u v weight" edge per line, binary files start with BINARY_MAGIC or BINARY_MAGIC_UNSIGNED
+    :param path: path to the edge file
+    :param chunk_size: roughly how many bytes are parsed per chunk
+    :return: a generator of (u, v, weights) triples, one per chunk, array('q') unless the values need more range
+    """
+    with open(path, 'rb') as edge_file:
+        if os.fstat(edge_file.fileno()).st_size == 0:  # can't mmap an empty file
+            return
+        with mmap.mmap(edge_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic = mapped[:len(BINARY_MAGIC)]
+            if magic in (BINARY_MAGIC, BINARY_MAGIC_UNSIGNED):
+                yield from _binary_chunks(mapped, chunk_size, magic == BINARY_MAGIC_UNSIGNED)
+            else:
+                for numbers in _text_chunks(mapped, chunk_size):
+                    yield numbers[0::3], numbers[1::3], numbers[2::3]
+
+
+def _text_chunks(mapped, chunk_size):
+    """
+    Splits mapped text on line boundaries and converts each piece to one flat array of ints
+    :param mapped: the mmap of a text edge file
+    :param chunk_size: roughly how many bytes are parsed per chunk
+    :return: a generator of flat array('q') holding u, v, weight triples, or a list of ints if they don't fit
+    """
+    size = len(mapped)
+    pos = 0
+    while pos < size:
+        end = pos + chunk_size
+        if end >= size:
+            end = size
+        else:
+            newline = mapped.rfind(b"\n", pos, end)
+            if newline == -1:  # one very long line, read on to its end
+                newline = mapped.find(b"\n", end)
+            end = size if newline == -1 else newline + 1
+        fields = mapped[pos:end].split()
+        if len(fields) % 3 != 0:
+            raise ValueError("edge file lines must have exactly 3 fields: u v weight")
+        try:
+            yield array('q', map(int, fields))
+        except OverflowError:  # ids such as 64 bit hashes, or anything else python's int accepts
+            yield list(map(int, fields))
+        pos = end
+
+
+def _binary_chunks(mapped, chunk_size, unsigned=False):
+    """
+    Reads the packed triples after the header of a binary edge file
+    :param mapped: the mmap of a binary edge file
+    :param chunk_size: roughly how many bytes are read per chunk
+    :param unsigned: the file has BINARY_MAGIC_UNSIGNED, so u and v are uint64
+    :return: a generator of (u, v, weights) triples, see _decode_records
+    """
+    record = 3 * array('q').itemsize
+    if (len(mapped) - len(BINARY_MAGIC)) % record != 0:
+        raise ValueError("binary edge file is truncated")
+    step = max(1, chunk_size // record) * record
+    for pos in range(len(BINARY_MAGIC), len(mapped), step):
+        yield _decode_records(mapped[pos:pos + step], unsigned)
+
+
+def _decode_records(data, unsigned):
+    """
+    :param data: bytes holding whole little endian u, v, weight records
+    :param unsigned: u and v are uint64 rather than int64
+    :return: (u, v, weights), arrays of typecode 'Q' or 'q' for u and v and 'q' for weights
+    """
+    numbers = array('Q' if unsigned else 'q')
+    numbers.frombytes(data)
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    weights = numbers[2::3]
+    if unsigned:  # the weights are still int64, reinterpret their bits
+        weights = array('q', weights.tobytes())
+    return numbers[0::3], numbers[1::3], weights
+
+
+def text_to_binary(text_path, binary_path, chunk_size=CHUNK_SIZE):
+    """
+    Converts a text edge file to the binary edge format.
+    Ids of 2**63 and up make it BINARY_MAGIC_UNSIGNED, which is only known once they turn up. The int64 records
+    written before then are non negative and so already the same bytes as uint64, only the header is rewritten.
+    :param text_path: the text edge file to read
+    :param binary_path: where to write the binary file
+    :param chunk_size: roughly how many bytes are parsed per chunk
+    :return: None
+    """
+    lowest = highest = 0  # range of the vertex ids so far
+    with open(binary_path, 'wb') as output:
+        output.write(BINARY_MAGIC)
+        for chunk_u, chunk_v, chunk_w in iter_edge_chunks(text_path, chunk_size):
+            if len(chunk_u):
+                lowest = min(lowest, min(chunk_u), min(chunk_v))
+                highest = max(highest, max(chunk_u), max(chunk_v))
+            if lowest < -2**63 or highest >= 2**64 or lowest < 0 and highest >= 2**63:
+                raise ValueError("binary edge files hold ids from -2**63 to 2**64-1, and no negative ids with ids of 2**63 and up")
+            if not _fits(chunk_w, 'q'):
+                raise ValueError("binary edge files hold weights in int64 range")
+            _write_edge_records(output, chunk_u, chunk_v, chunk_w, highest >= 2**63)
+        if highest >= 2**63:
+            output.seek(0)
+            output.write(BINARY_MAGIC_UNSIGNED)
+
+
+def _write_edge_records(output, u, v, weights, unsigned=False):
+    """
+    Appends edges to an open binary edge file as little endian triples
+    :param output: file opened for binary writing, already holding the header
+    :param u: array or list of the first vertex of each edge
+    :param v: array or list of the second vertex of each edge
+    :param weights: array or list of the edge weights, in int64 range
+    :param unsigned: write u and v as uint64 for a BINARY_MAGIC_UNSIGNED file rather than int64
+    :return: None
+    """
+    typecode = 'Q' if unsigned else 'q'
+    weights = _typed(weights, 'q')
+    if unsigned:  # store the weights' int64 bits in the uint64 slots
+        weights = array('Q', weights.tobytes())
+    numbers = array(typecode, [0]) * (3 * len(u))
+    numbers[0::3] = _typed(u, typecode)
+    numbers[1::3] = _typed(v, typecode)
+    numbers[2::3] = weights
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    numbers.tofile(output)
+
+
+def binary_to_text(binary_path, text_path, chunk_size=CHUNK_SIZE):
+    """
+    Converts a binary edge file back to the text format read by process_input
+    :param binary_path: the binary edge file to read
+    :param text_path: where to write the text file
+    :param chunk_size: roughly how many bytes are read per chunk
+    :return: None
+    """
+    with open(text_path, 'w') as output:
+        for chunk_u, chunk_v, chunk_w in iter_edge_chunks(binary_path, chunk_size):
+            output.writelines("%d %d %d\n" % edge for edge in zip(chunk_u, chunk_v, chunk_w))
 
 
 
@@ -82,47 +513,168 @@ def output_MST(edge_array):
 
 
 
-class disjoint_set:
-    def __init__(self, int_set):
+class dynamic_mst:
+    def __init__(self, graph_text=None, tree_edges=None):
         """
-        Assume that int_set contains all the integers in interval [a,b]. So the set {1,2,4} is not allowed
-        :param full_set: a set of integers. For kruskals these integers are the nodes
+        A minimum spanning tree that is kept up to date as edges are added or get cheaper.
+        An update only runs kruskals over the current tree edges plus the new batch, which is enough because
+        every edge of the new mst is either an old tree edge or one of the batch.
+
+        :param graph_text: a document of a network, the tree is seeded with kruskal_mst of it
+        :param tree_edges: alternatively a list of [u, v, weight] edges already forming a minimum spanning tree/forest
         """
-        self.size = 0
-        self.parent_array = []
-        for num in int_set:
-            n = len(self.parent_array)
-            if num > n - 1: #If an integer is bigger than parent array we need to extend parent array
-                add_array = [-1] * (num - n + 1)
-                self.parent_array.extend(add_array) #Add on enough space at the end of parent array
+        if graph_text is not None:
+            tree_edges = kruskal_mst(graph_text)
+        elif tree_edges is None:
+            tree_edges = []
+        self.tree_edges = sorted((list(edge) for edge in tree_edges), key=itemgetter(2))
 
+    def insert_edges(self, batch):
+        """
+        Adds a batch of edges to the graph and updates the tree
+        :param batch: an iterable of [u, v, weight] edges
+        :return: the edges of batch that are now in the tree
+        """
+        batch = sorted((list(edge) for edge in batch), key=itemgetter(2))
+        if not batch:
+            return []
+
+        vertices = set()
+        for edge in self.tree_edges:
+            vertices.add(edge[0])
+            vertices.add(edge[1])
+        for edge in batch:
+            vertices.add(edge[0])
+            vertices.add(edge[1])
+        vertex_set = sparse_disjoint_set(vertices)
+        n = len(vertices)
+
+        new_tree = []
+        added = []
+        # both lists are already in weight order so merging is linear, on ties the old tree edge wins
+        for source, edge in heapq.merge(((0, edge) for edge in self.tree_edges), ((1, edge) for edge in batch),
+                                        key=lambda item: item[1][2]):
+            if len(new_tree) >= n-1:
+                break
+            if vertex_set.union_by_rank(edge[0], edge[1]):
+                new_tree.append(edge)
+                if source == 1:
+                    added.append(edge)
+
+        self.tree_edges = new_tree
+        return added
+
+    def insert_edge(self, u, v, weight):
+        """
+        Adds one edge to the graph and updates the tree
+        :param u: a vertex
+        :param v: a vertex
+        :param weight: the weight of the edge
+        :return: True if the edge is now in the tree
+        """
+        return len(self.insert_edges([[u, v, weight]])) > 0
 
+    def decrease_weights(self, batch):
+        """
+        Lowers the weight of existing edges and updates the tree.
+        A tree edge stays in the tree when it gets cheaper. A non tree edge can be handled as a new edge because
+        its old, heavier copy was not in the tree anyway. Weight increases are not supported.
 
+        :param batch: an iterable of [u, v, new weight] edges
+        :return: the edges of batch that are now in the tree
+        """
+        batch = [list(edge) for edge in batch]
+        tree_index = {}
+        for i, edge in enumerate(self.tree_edges):
+            tree_index[(edge[0], edge[1])] = i
+            tree_index[(edge[1], edge[0])] = i
+
+        new_edges = []
+        lowered = []
+        for edge in batch:
+            i = tree_index.get((edge[0], edge[1]))
+            if i is None or edge[2] >= self.tree_edges[i][2]:  # not the tree copy of a (possibly parallel) edge
+                new_edges.append(edge)
+            else:
+                self.tree_edges[i] = [self.tree_edges[i][0], self.tree_edges[i][1], edge[2]]
+                lowered.append(edge)
+        if lowered:
+            self.tree_edges.sort(key=itemgetter(2))
+
+        return lowered + self.insert_edges(new_edges)
+
+    def decrease_weight(self, u, v, weight):
+        """
+        Lowers the weight of one existing edge and updates the tree
+        :param u: a vertex
+        :param v: a vertex
+        :param weight: the new, lower weight of the edge
+        :return: True if the edge is now in the tree
+        """
+        return len(self.decrease_weights([[u, v, weight]])) > 0
 
-    def find_with_PC(self, a):
+    def get_edges(self):
         """
-        finds the parent of node a and performs path compression
-        :param a: a non-negative integer
-        :return: p the parent of a
+        :return: the list of edges in the tree, in weight order
         """
-        if self.parent_array[a] < 0: #We've found the parent because only parents are negative
-            return a
-        else:
-            self.parent_array[a] = self.find_with_PC(self.parent_array[a])
-            return self.parent_array[a]
+        return self.tree_edges
+
+    def total_weight(self):
+        """
+        :return: the sum of the tree edge weights
+        """
+        return sum(edge[2] for edge in self.tree_edges)
 
 
 
 
+class disjoint_set:
+    def __init__(self, int_set):
+        """
+        Union-find stored in a single typed array. A negative entry marks a root and holds minus its height,
+        a non-negative entry is the index of the parent. Both find and union are iterative so long chains
+        can't hit the recursion limit.
+
+        Assume that int_set contains all the integers in interval [a,b]. So the set {1,2,4} is not allowed,
+        use sparse_disjoint_set for sparse or non integer ids
+        :param int_set: a set of integers, or an integer n meaning the nodes 0..n-1. For kruskals these integers are the nodes
+        """
+        if isinstance(int_set, int):
+            size = int_set
+        else:
+            size = max(int_set, default=-1) + 1  # parent array has to reach the biggest node
+        self.size = size
+        typecode = 'i' if size < 2**31 else 'q'  # 4 bytes per node unless the ids don't fit
+        self.parent_array = array(typecode, [-1]) * size
+
+    def _find(self, a):
+        """
+        finds the parent of node a and performs path compression (path halving)
+        :param a: a non-negative integer
+        :return: p the parent of a
+        """
+        parent_array = self.parent_array
+        parent = parent_array[a]
+        while parent >= 0:  # only roots are negative
+            grandparent = parent_array[parent]
+            if grandparent < 0:
+                return parent
+            parent_array[a] = grandparent  # point a at its grandparent and jump there
+            a = grandparent
+            parent = parent_array[a]
+        return a
+
+    find_with_PC = _find  # union_by_rank calls _find so subclasses can translate ids in find_with_PC only
+
     def union_by_rank(self, a, b):
         """
         unions two items a and b and their trees
         :param a: a non-negative integer
         :param b: a non-negative integer
-        :return: nothing
+        :return: True if a and b were in different trees, False if they already shared a root
         """
-        root_a = self.find_with_PC(a)
-        root_b = self.find_with_PC(b)
+        root_a = self._find(a)
+        root_b = self._find(b)
 
         if root_a == root_b: #Same parent?
             return False
@@ -137,3 +689,72 @@ class disjoint_set:
         else: #both have the same height
             self.parent_array[root_a] = root_b
             self.parent_array[root_b] = -1 * (height_b + 1)
+        return True
+
+    def find_many(self, nodes):
+        """
+        finds the parent of every node in nodes
+        :param nodes: an iterable of non-negative integers, e.g. a list, array('i') or numpy array
+        :return: an array of the parents, in the same order as nodes
+        """
+        find = self.find_with_PC
+        return array(self.parent_array.typecode, [find(a) for a in _as_int_list(nodes)])
+
+    def union_many(self, nodes_a, nodes_b):
+        """
+        unions nodes_a[i] with nodes_b[i] for every i, in order
+        :param nodes_a: an iterable of non-negative integers
+        :param nodes_b: an iterable of non-negative integers the same length as nodes_a
+        :return: array('b') with 1 where the pair joined two trees and 0 where it was already connected
+        """
+        union = self.union_by_rank
+        return array('b', [union(a, b) for a, b in zip(_as_int_list(nodes_a), _as_int_list(nodes_b))])
+
+
+class sparse_disjoint_set(disjoint_set):
+    def __init__(self, vertices):
+        """
+        Disjoint set over arbitrary hashable vertex ids, e.g. 64 bit hashes or strings.
+        The ids are renumbered to 0..n-1 so memory depends on the number of vertices, not the biggest id.
+        :param vertices: an iterable of distinct vertex ids
+        """
+        self.labels = list(vertices)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        super().__init__(len(self.labels))
+
+    def find_with_PC(self, a):
+        """
+        finds the parent of vertex a and performs path compression
+        :param a: a vertex id
+        :return: the id of the parent of a
+        """
+        return self.labels[self._find(self.index[a])]
+
+    def union_by_rank(self, a, b):
+        """
+        unions two vertices a and b and their trees
+        :param a: a vertex id
+        :param b: a vertex id
+        :return: True if a and b were in different trees, False if they already shared a root
+        """
+        return super().union_by_rank(self.index[a], self.index[b])
+
+    def find_many(self, nodes):
+        """
+        finds the parent of every vertex in nodes
+        :param nodes: an iterable of vertex ids
+        :return: a list of the parent ids, in the same order as nodes
+        """
+        find = self.find_with_PC
+        return [find(a) for a in _as_int_list(nodes)]
+
+
+def _as_int_list(nodes):
+    """
+    Turns typed arrays (array.array, numpy) into a list of python ints so the loops don't box every element
+    :param nodes: an iterable of integers
+    :return: something iterable over python ints
+    """
+    if hasattr(nodes, 'tolist'):
+        return nodes.tolist()
+    return nodes
@@ -1,15 +1,45 @@
+import math
+import random as rnd
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the batch test falls back to plain python
+    np = None
+
+
+def _primes_below(limit):
+    """
+    Simple sieve of eratosthenes for the trial division primes
+    :param limit: an integer
+    :return: list of the primes less than limit
+    """
+    is_prime = bytearray([1]) * limit
+    is_prime[0:2] = b"\x00\x00"
+    for p in range(2, math.isqrt(limit - 1) + 1):
+        if is_prime[p]:
+            is_prime[p*p::p] = bytes(len(range(p*p, limit, p)))
+    return [p for p in range(limit) if is_prime[p]]
+
+
+TRIAL_LIMIT = 1000
+SMALL_PRIMES = _primes_below(TRIAL_LIMIT)
+SMALL_PRIMES_SET = frozenset(SMALL_PRIMES)
+SMALL_PRIMORIAL = math.prod(SMALL_PRIMES)  # one gcd with this does all the trial divisions
+DETERMINISTIC_WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)  # exact for every n < 3.18 * 10^23 > 2^64
+DEFAULT_ROUNDS = 40  # random rounds is_prime uses above 2^64
+
+
 def miller_rabin(n, k):
     """
     Miller Rabin primality test for n
-    Will fail when n is a carmichael number
+    Small primes are tried by trial division first, which also decides every n < TRIAL_LIMIT^2 exactly
     :param n: an integer greater than 1
     :param k: number of random trials
     :return: True if "probably prime", False otherwise
     """
-    if n % 2 == 0:  # return false if even number
-        return False
-    elif n == 2 or n == 3:
-        return True
+    small = _trial_division(n)
+    if small is not None:
+        return small
 
     # First factorise n-1
     s = 0
@@ -20,18 +50,99 @@ def miller_rabin(n, k):
 
     for i in range(k):
         a = rnd.randrange(2, n-1)
-
-        #if fast_expo(a, n-1, n) != 1:
-        if pow(a, n-1, n) != 1:
+        if not _strong_probable_prime(n, a, t, s):
             return False
-        else:
-            #old = fast_expo(a, t, n)  # get a^((2^0)*t) first
-            old = pow(a, t, n)
-            for j in range(1, s):
-                new = pow(old, 2, n)
-                if new == 1 and (old != n-1 and old != 1):
-                    return False
-                else:
-                    old = new
 
     return True  # Finally passed all the tests so probably prime
+
+
+def is_prime(n):
+    """
+    Primality test that is deterministic for n < 2^64, using the first 12 primes as witnesses.
+    Larger n fall back to miller_rabin with DEFAULT_ROUNDS random trials.
+    :param n: an integer
+    :return: True if n is prime (probably prime above 2^64), False otherwise
+    """
+    small = _trial_division(n)
+    if small is not None:
+        return small
+    if n >= 2**64:
+        return miller_rabin(n, DEFAULT_ROUNDS)
+
+    s = 0
+    t = n - 1
+    while t % 2 == 0:
+        t = t//2
+        s += 1
+    for a in DETERMINISTIC_WITNESSES:
+        if not _strong_probable_prime(n, a, t, s):
+            return False
+    return True
+
+
+def is_prime_batch(candidates):
+    """
+    Deterministic primality test of many candidates.
+    With numpy, the trial division over SMALL_PRIMES is done for the whole batch at once, so most composites
+    are rejected before any modular exponentiation, and the witness rounds for the survivors run vectorized
+    in montgomery.strong_probable_prime_batch.
+    :param candidates: a numpy integer array or an iterable of integers
+    :return: a numpy bool array when given a numpy array, otherwise a list of bools
+    """
+    if np is not None and isinstance(candidates, np.ndarray):
+        values = candidates.astype(np.uint64) if candidates.dtype.kind in "iu" else None
+        if values is None or (candidates.dtype.kind == "i" and (candidates < 0).any()):
+            return np.array([is_prime(int(n)) for n in candidates.ravel()], dtype=bool).reshape(candidates.shape)
+        survivors = values > 1
+        for p in SMALL_PRIMES:
+            survivors &= (values % np.uint64(p) != 0) | (values == np.uint64(p))
+        result = survivors.copy()
+        undecided = np.flatnonzero(survivors & (values >= np.uint64(TRIAL_LIMIT * TRIAL_LIMIT)))
+        if len(undecided):  # only the survivors need witnesses, run in lockstep by the montgomery backend
+            from montgomery import strong_probable_prime_batch
+            # base 2 alone rejects nearly every composite left, so the other witnesses only see the likely primes
+            passed = strong_probable_prime_batch(values.flat[undecided], DETERMINISTIC_WITNESSES[:1])
+            undecided_passed = undecided[passed]
+            passed[passed] = strong_probable_prime_batch(values.flat[undecided_passed], DETERMINISTIC_WITNESSES[1:])
+            result.flat[undecided] = passed
+        return result
+    return [is_prime(n) for n in candidates]
+
+
+def _trial_division(n):
+    """
+    Decides n by trial division with SMALL_PRIMES when that is enough
+    :param n: an integer
+    :return: True or False if that decides n, None if n still needs a primality test
+    """
+    if n < TRIAL_LIMIT:
+        return n in SMALL_PRIMES_SET
+    if math.gcd(n, SMALL_PRIMORIAL) != 1:  # n has a small prime factor
+        return False
+    if n < TRIAL_LIMIT * TRIAL_LIMIT:  # no factor up to sqrt(n)
+        return True
+    return None
+
+
+def _strong_probable_prime(n, a, t, s):
+    """
+    One Miller Rabin round with base a, where n - 1 = 2^s * t with t odd
+    :param n: an odd integer greater than 3
+    :param a: the base, 2 <= a <= n - 2
+    :param t: odd part of n - 1
+    :param s: power of two in n - 1
+    :return: False if a proves n composite, True otherwise
+    """
+    a %= n
+    if a == 0:
+        return True
+    old = pow(a, t, n)  # get a^((2^0)*t) first
+    if old == 1 or old == n-1:
+        return True
+    for j in range(1, s):
+        old = pow(old, 2, n)
+        if old == n-1:
+            return True
+        if old == 1:  # 1 reached without passing n-1, a non trivial square root of 1
+            return False
+    return False
@@ -0,0 +1,136 @@
+"""
+Vectorized 64 bit Montgomery arithmetic on numpy uint64 arrays, used by miller_rabin.is_prime_batch.
+Products are 128 bits wide, so they are built from 32 bit halves. All arithmetic wraps mod 2^64, R = 2^64.
+"""
+import numpy as np
+
+
+LOW_MASK = np.uint64(0xFFFFFFFF)
+SHIFT = np.uint64(32)
+ONE = np.uint64(1)
+
+
+def multiply_wide(a, b):
+    """
+    Full 128 bit product of two uint64 arrays
+    :param a: uint64 array
+    :param b: uint64 array
+    :return: (high, low) uint64 arrays with a * b = high * 2^64 + low
+    """
+    a_low = a & LOW_MASK
+    a_high = a >> SHIFT
+    b_low = b & LOW_MASK
+    b_high = b >> SHIFT
+    low_low = a_low * b_low
+    low_high = a_low * b_high
+    high_low = a_high * b_low
+    middle = (low_low >> SHIFT) + (low_high & LOW_MASK) + (high_low & LOW_MASK)  # at most 3 * (2^32 - 1)
+    low = (low_low & LOW_MASK) | (middle << SHIFT)
+    high = a_high * b_high + (low_high >> SHIFT) + (high_low >> SHIFT) + (middle >> SHIFT)
+    return high, low
+
+
+def negated_inverse(n):
+    """
+    -n^-1 mod 2^64 for odd n, by newton iteration
+    :param n: uint64 array of odd moduli
+    :return: uint64 array n' with n * n' = -1 mod 2^64
+    """
+    inverse = n.copy()  # n * n = 1 mod 8 for odd n, so this is right to 3 bits
+    for _ in range(5):  # each step doubles the correct bits, 3 -> 96
+        inverse *= np.uint64(2) - n * inverse
+    return np.uint64(0) - inverse
+
+
+def reduce(high, low, n, n_prime):
+    """
+    Montgomery reduction, (high * 2^64 + low) / R mod n
+    :param high: uint64 array, high halves of a value less than n * R
+    :param low: uint64 array, low halves
+    :param n: uint64 array of odd moduli
+    :param n_prime: negated_inverse(n)
+    :return: uint64 array in [0, n)
+    """
+    m = low * n_prime
+    product_high, _ = multiply_wide(m, n)
+    carry = (low != 0).astype(np.uint64)  # low + (m * n mod 2^64) is exactly 0 or 2^64
+    total = high + product_high
+    overflow = total < high
+    result = total + carry
+    overflow |= result < total
+    return np.where(overflow | (result >= n), result - n, result)
+
+
+def multiply(a, b, n, n_prime):
+    """
+    Montgomery product a * b / R mod n
+    :param a: uint64 array in montgomery form
+    :param b: uint64 array in montgomery form
+    :param n: uint64 array of odd moduli
+    :param n_prime: negated_inverse(n)
+    :return: uint64 array in montgomery form
+    """
+    high, low = multiply_wide(a, b)
+    return reduce(high, low, n, n_prime)
+
+
+def to_montgomery(a, n, n_prime):
+    """
+    Converts a to montgomery form a * R mod n
+    :param a: uint64 array, each a < n
+    :param n: uint64 array of odd moduli
+    :param n_prime: negated_inverse(n)
+    :return: uint64 array in montgomery form
+    """
+    r2 = (np.uint64(0) - n) % n  # R mod n
+    for _ in range(64):  # double 64 times to get R^2 mod n
+        doubled = r2 << ONE
+        r2 = np.where((r2 >> np.uint64(63)).astype(bool) | (doubled >= n), doubled - n, doubled)
+    return multiply(a, r2, n, n_prime)
+
+
+def strong_probable_prime_batch(values, witnesses):
+    """
+    Miller Rabin rounds for a whole batch of candidates, every witness for every candidate run in lockstep.
+    Gives the same answers as running miller_rabin._strong_probable_prime on each pair.
+    :param values: uint64 array of odd candidates greater than 3
+    :param witnesses: sequence of bases, each less than every candidate
+    :return: bool array, True where no witness proves the candidate composite
+    """
+    values = np.asarray(values, dtype=np.uint64).ravel()
+    count = len(values)
+    n = np.tile(values, len(witnesses))
+    bases = np.repeat(np.asarray(witnesses, dtype=np.uint64), count)
+    n_prime = negated_inverse(n)
+
+    # n - 1 = 2^s * t with t odd
+    t = n - ONE
+    s = np.zeros(len(n), dtype=np.uint64)
+    even = (t & ONE) == 0
+    while even.any():
+        t = np.where(even, t >> ONE, t)
+        s += even.astype(np.uint64)
+        even = (t & ONE) == 0
+
+    one = (np.uint64(0) - n) % n  # 1 in montgomery form is R mod n
+    minus_one = n - one
+    base = to_montgomery(bases % n, n, n_prime)
+
+    # left to right square and multiply, every lane uses its own exponent t
+    x = one.copy()
+    for bit in range(63, -1, -1):
+        x = multiply(x, x, n, n_prime)
+        use = ((t >> np.uint64(bit)) & ONE).astype(bool)
+        x = np.where(use, multiply(x, base, n, n_prime), x)
+
+    passed = (bases % n == 0) | (x == one) | (x == minus_one)
+    undecided = ~passed
+    for j in range(1, int(s.max()) if len(s) else 0):
+        active = undecided & (np.uint64(j) < s)
+        if not active.any():
+            break
+        x = np.where(active, multiply(x, x, n, n_prime), x)
+        passed |= active & (x == minus_one)
+        undecided &= active & (x != one) & (x != minus_one)  # reaching 1 first proves composite
+
+    return passed.reshape(len(witnesses), count).all(axis=0)
@@ -0,0 +1,238 @@
+"""
+Benchmarks for kruskals_algorithm on seeded synthetic graphs.
+
+Run e.g.  python mst_benchmark.py --sizes 1000 10000 --families sparse grid --output results.json
+Every (family, size, engine) gets one record with the time spent parsing, sorting, in the union-find and in the
+whole of kruskal_mst, plus the peak memory of a separate traced run (of this process only, so the boruvka engine's
+worker processes are not counted).
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from kruskals_algorithm import compact_vertices, disjoint_set, kruskal_mst, load_edges, sorted_edge_order
+
+
+MAX_WEIGHT = 1000000
+DENSE_LIMIT = 3000  # the dense family has n^2 / 2 edges, larger sizes are skipped
+
+
+def random_sparse_graph(n, seed, degree=4):
+    """
+    A random spanning tree plus random extra edges, about degree * n / 2 edges in total
+    :param n: number of vertices
+    :param seed: seed for the generator
+    :param degree: average vertex degree
+    :return: a list of edges (u, v, weight)
+    """
+    rng = random.Random(seed)
+    edges = [(rng.randrange(i), i, rng.randrange(MAX_WEIGHT)) for i in range(1, n)]
+    for _ in range(max(0, degree * n // 2 - (n - 1))):
+        edges.append((rng.randrange(n), rng.randrange(n), rng.randrange(MAX_WEIGHT)))
+    return edges
+
+
+def dense_graph(n, seed):
+    """
+    The complete graph on n vertices with random weights
+    :param n: number of vertices
+    :param seed: seed for the generator
+    :return: a list of edges (u, v, weight)
+    """
+    rng = random.Random(seed)
+    return [(i, j, rng.randrange(MAX_WEIGHT)) for i in range(n) for j in range(i + 1, n)]
+
+
+def grid_graph(n, seed):
+    """
+    A square grid with about n vertices, each joined to its right and lower neighbour
+    :param n: rough number of vertices
+    :param seed: seed for the generator
+    :return: a list of edges (u, v, weight)
+    """
+    rng = random.Random(seed)
+    side = max(1, int(n ** 0.5))
+    edges = []
+    for row in range(side):
+        for col in range(side):
+            vertex = row * side + col
+            if col + 1 < side:
+                edges.append((vertex, vertex + 1, rng.randrange(MAX_WEIGHT)))
+            if row + 1 < side:
+                edges.append((vertex, vertex + side, rng.randrange(MAX_WEIGHT)))
+    return edges
+
+
+def power_law_graph(n, seed, links=3):
+    """
+    Preferential attachment (Barabasi-Albert) graph, each new vertex links to `links` vertices picked by degree
+    :param n: number of vertices
+    :param seed: seed for the generator
+    :param links: edges added per new vertex
+    :return: a list of edges (u, v, weight)
+    """
+    rng = random.Random(seed)
+    edges = []
+    endpoints = [0]  # every vertex appears once per incident edge, so sampling it is sampling by degree
+    for vertex in range(1, n):
+        for _ in range(min(links, vertex)):
+            target = rng.choice(endpoints)
+            edges.append((vertex, target, rng.randrange(MAX_WEIGHT)))
+            endpoints.append(target)
+            endpoints.append(vertex)
+    return edges
+
+
+def long_path_graph(n, seed):
+    """
+    A single path 0 - 1 - ... - n-1, the worst case for union-find chains
+    :param n: number of vertices
+    :param seed: seed for the generator
+    :return: a list of edges (u, v, weight)
+    """
+    rng = random.Random(seed)
+    return [(i, i + 1, rng.randrange(MAX_WEIGHT)) for i in range(n - 1)]
+
+
+def hashed_ids_graph(n, seed):
+    """
+    The sparse family with every vertex renamed to a random 64 bit id, as when vertices are keyed by a hash.
+    Ids of 2**63 and up don't fit in int64, and 2**64-1 is always one of them.
+    :param n: number of vertices
+    :param seed: seed for the generator
+    :return: a list of edges (u, v, weight)
+    """
+    rng = random.Random(seed)
+    names = [2**64 - 1]
+    taken = set(names)
+    while len(names) < n:
+        name = rng.getrandbits(64)
+        if name not in taken:
+            taken.add(name)
+            names.append(name)
+    return [(names[a], names[b], weight) for a, b, weight in random_sparse_graph(n, seed)]
+
+
+FAMILIES = {
+    "sparse": random_sparse_graph,
+    "dense": dense_graph,
+    "grid": grid_graph,
+    "power_law": power_law_graph,
+    "long_path": long_path_graph,
+    "hashed_ids": hashed_ids_graph,
+}
+
+
+def write_graph(edges, path):
+    """
+    Writes edges in the text format read by process_input
+    :param edges: a list of edges (u, v, weight)
+    :param path: the file to write
+    :return: None
+    """
+    with open(path, 'w') as output:
+        output.writelines("%d %d %d\n" % edge for edge in edges)
+
+
+def time_stages(path):
+    """
+    Times each stage of kruskals algorithm on its own
+    :param path: a graph file
+    :return: dictionary of seconds spent parsing, sorting and in the union-find
+    """
+    start = time.perf_counter()
+    u, v, weights = load_edges(path)
+    parsed = time.perf_counter()
+    order = list(sorted_edge_order(weights))
+    ordered = time.perf_counter()
+
+    labels, dense_u, dense_v = compact_vertices(u, v)
+    vertex_set = disjoint_set(len(labels))
+    union = vertex_set.union_by_rank
+    unions = 0
+    for i in order:
+        if unions >= len(labels) - 1:
+            break
+        if union(dense_u[i], dense_v[i]):
+            unions += 1
+    finished = time.perf_counter()
+
+    return {"parse_seconds": parsed - start, "sort_seconds": ordered - parsed, "union_find_seconds": finished - ordered}
+
+
+def run_benchmark(families, sizes, engines=("kruskal",), seed=0, repeats=1, dense_limit=DENSE_LIMIT):
+    """
+    Benchmarks every engine on every family at every size, checking they all find a tree of the same weight
+    :param families: names from FAMILIES
+    :param sizes: vertex counts to generate
+    :param engines: kruskal_mst engines to time
+    :param seed: base seed, the same seed always gives the same graphs
+    :param repeats: runs per measurement, the fastest is kept
+    :param dense_limit: the dense family is skipped above this many vertices
+    :return: a list of result dictionaries
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for family in families:
+            for size in sizes:
+                if family == "dense" and size > dense_limit:
+                    continue
+                edges = FAMILIES[family](size, seed)
+                path = os.path.join(work_dir, "%s_%d.txt" % (family, size))
+                write_graph(edges, path)
+                stages = min((time_stages(path) for _ in range(repeats)), key=lambda r: sum(r.values()))
+
+                expected = None
+                for engine in engines:
+                    best_seconds = None
+                    for _ in range(repeats):
+                        start = time.perf_counter()
+                        tree = kruskal_mst(path, engine=engine)
+                        seconds = time.perf_counter() - start
+                        if best_seconds is None or seconds < best_seconds:
+                            best_seconds = seconds
+
+                    # tracing slows allocation down a lot, so memory gets its own run apart from the timed ones
+                    tracemalloc.start()
+                    kruskal_mst(path, engine=engine)
+                    peak_bytes = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+
+                    record = {"family": family, "size": size, "edges": len(edges), "engine": engine, "seed": seed,
+                              "total_seconds": best_seconds, "peak_bytes": peak_bytes,
+                              "tree_edges": len(tree), "tree_weight": sum(edge[2] for edge in tree)}
+                    if expected is None:
+                        expected = (record["tree_edges"], record["tree_weight"])
+                    elif (record["tree_edges"], record["tree_weight"]) != expected:
+                        raise AssertionError("%s disagrees on %s" % (engine, record))
+                    record.update(stages)
+                    results.append(record)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark kruskal_mst on synthetic graphs")
+    parser.add_argument("--families", nargs="+", default=list(FAMILIES), choices=list(FAMILIES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--engines", nargs="+", default=["kruskal"], choices=["kruskal", "boruvka", "external"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--dense-limit", type=int, default=DENSE_LIMIT)
+    parser.add_argument("--output", help="write the results here as json, otherwise print them")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.families, args.sizes, args.engines, args.seed, args.repeats, args.dense_limit)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    else:
+        for record in results:
+            print(json.dumps(record))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import multiprocessing
+import os
+import queue
+import random
+
+from miller_rabin import DEFAULT_ROUNDS, _primes_below, is_prime, miller_rabin
+
+
+SIEVE_PRIMES = _primes_below(1 << 16)[1:]  # odd primes used to sieve each candidate window
+WINDOW_LENGTH = 8192  # candidates sieved at once
+PARALLEL_BITS = 256  # smaller primes are found faster than a process pool starts
+MIN_SIEVE_BITS = 32  # below this candidates could be sieve primes themselves, so they're just tested one by one
+
+
+def random_prime(bits, rounds=DEFAULT_ROUNDS, processes=None):
+    """
+    Generates a random prime with exactly bits bits, e.g. for key generation
+    Each worker picks a random start, sieves a window of candidates by SIEVE_PRIMES and runs miller_rabin only on the
+    survivors. The first worker to confirm a prime wins and the others are cancelled.
+    :param bits: bit length of the prime, at least 2
+    :param rounds: miller_rabin trials for candidates of 64 bits and more
+    :param processes: number of worker processes, defaults to the number of cores
+    :return: a (probable) prime p with 2^(bits-1) <= p < 2^bits
+    """
+    return _generate(bits, False, rounds, processes)
+
+
+def random_safe_prime(bits, rounds=DEFAULT_ROUNDS, processes=None):
+    """
+    Generates a random safe prime p, i.e. p and (p-1)/2 are both prime, with exactly bits bits
+    Works like random_prime but the sieve also crosses off every candidate where (p-1)/2 has a small factor.
+    :param bits: bit length of the prime, at least 3
+    :param rounds: miller_rabin trials for candidates of 64 bits and more
+    :param processes: number of worker processes, defaults to the number of cores
+    :return: a (probable) safe prime p with 2^(bits-1) <= p < 2^bits
+    """
+    return _generate(bits, True, rounds, processes)
+
+
+def _generate(bits, safe, rounds, processes):
+    """
+    Runs the search in this process for small sizes, otherwise in a pool of processes racing each other
+    :param bits: bit length of the prime
+    :param safe: True to look for a safe prime
+    :param rounds: miller_rabin trials
+    :param processes: number of worker processes, None for the number of cores
+    :return: the prime found
+    """
+    if bits < (3 if safe else 2):
+        raise ValueError("there are no %sprimes with %d bits" % ("safe " if safe else "", bits))
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or bits < PARALLEL_BITS:
+        return _search(bits, safe, rounds)
+
+    stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_search_worker, args=(bits, safe, rounds, stop, results), daemon=True)
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    try:
+        while True:
+            try:
+                return results.get(timeout=0.1)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers) and results.empty():
+                    raise RuntimeError("every prime search worker exited without a result")
+    finally:
+        stop.set()  # cancel the workers that are still searching
+        for worker in workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+
+
+def _search_worker(bits, safe, rounds, stop, results):
+    """
+    Process entry point, searches until a prime is found or stop is set
+    :param bits: bit length of the prime
+    :param safe: True to look for a safe prime
+    :param rounds: miller_rabin trials
+    :param stop: multiprocessing.Event set once any worker has a result
+    :param results: multiprocessing.Queue the prime is put on
+    :return: None
+    """
+    prime = _search(bits, safe, rounds, stop)
+    if prime is not None:
+        results.put(prime)
+
+
+def _search(bits, safe, rounds, stop=None):
+    """
+    Tries random sieved windows until one holds a prime
+    :param bits: bit length of the prime
+    :param safe: True to look for a safe prime
+    :param rounds: miller_rabin trials
+    :param stop: optional event, the search gives up and returns None once it is set
+    :return: the prime, or None if stopped
+    """
+    rng = random.SystemRandom()
+    low = 1 << (bits - 1)
+    high = 1 << bits
+    while stop is None or not stop.is_set():
+        if bits < MIN_SIEVE_BITS:
+            candidates = [rng.randrange(low, high)]
+        else:
+            # odd, and 3 mod 4 for safe primes so (p-1)/2 is odd
+            start = rng.randrange(low, high) | (3 if safe else 1)
+            candidates = _sieve_window(start, 4 if safe else 2, safe)
+        for n in candidates:
+            if n >= high:
+                break
+            if stop is not None and stop.is_set():
+                return None
+            if safe:
+                # cheap single rounds on both numbers weed out most candidates before the full tests
+                q = (n - 1) // 2
+                if (_probable_prime(q, 1) and _probable_prime(n, 1) and
+                        _probable_prime(q, rounds) and _probable_prime(n, rounds)):
+                    return n
+            elif _probable_prime(n, rounds):
+                return n
+    return None
+
+
+def _sieve_window(start, stride, safe):
+    """
+    Incremental sieve over the candidates start, start + stride, ..., one residue per sieve prime
+    :param start: first candidate, odd
+    :param stride: gap between candidates, 2 or 4
+    :param safe: also cross off candidates n where (n-1)/2 is divisible by a sieve prime
+    :return: list of the candidates that survive
+    """
+    flags = bytearray([1]) * WINDOW_LENGTH
+    for p in SIEVE_PRIMES:
+        step_inverse = pow(stride, -1, p)
+        residue = start % p
+        first = (-residue * step_inverse) % p  # start + i*stride = 0 mod p
+        flags[first::p] = bytes(len(range(first, WINDOW_LENGTH, p)))
+        if safe:
+            first = ((1 - residue) * step_inverse) % p  # start + i*stride = 1 mod p, so p divides (n-1)/2
+            flags[first::p] = bytes(len(range(first, WINDOW_LENGTH, p)))
+    return [start + stride * i for i, flag in enumerate(flags) if flag]
+
+
+def _probable_prime(n, rounds):
+    """
+    :param n: an integer
+    :param rounds: miller_rabin trials for n >= 2^64
+    :return: True if n is prime (deterministic below 2^64, probably prime above)
+    """
+    if n < 2**64:
+        return is_prime(n)
+    return miller_rabin(n, rounds)
@@ -0,0 +1,130 @@
+from bisect import bisect_right
+from functools import lru_cache
+import math
+
+from miller_rabin import SMALL_PRIMES, _primes_below, is_prime
+
+
+SEGMENT_SIZE = 1 << 16  # numbers covered by one sieved segment
+CACHE_SEGMENTS = 256  # segments kept by the lru cache, 16 MB at the default size
+SIEVE_LIMIT = 10**12  # above this the base primes get too big, so windows are only sieved by SMALL_PRIMES
+WINDOW_SIZE = 4096  # numbers partially sieved at once above SIEVE_LIMIT
+
+_base_primes = []  # all primes up to _base_limit, grown on demand
+_base_limit = 1
+
+
+def primes_in_range(lo, hi=None):
+    """
+    Lazily yields the primes in [lo, hi) from a segmented sieve of eratosthenes.
+    Segments are aligned to SEGMENT_SIZE and cached, so repeated queries near each other are nearly free.
+    :param lo: lower bound, inclusive
+    :param hi: upper bound, exclusive, or None to run up to SIEVE_LIMIT
+    :return: a generator of primes in increasing order
+    """
+    lo = max(lo, 2)
+    if hi is not None and hi > SIEVE_LIMIT:
+        raise ValueError("primes_in_range only sieves up to SIEVE_LIMIT")
+    index = lo // SEGMENT_SIZE
+    while True:
+        segment_lo = index * SEGMENT_SIZE
+        if (hi is not None and segment_lo >= hi) or segment_lo >= SIEVE_LIMIT:
+            return
+        flags = sieve_segment(index)
+        position = flags.find(1, max(lo - segment_lo, 0))
+        end = SEGMENT_SIZE if hi is None else min(SEGMENT_SIZE, hi - segment_lo)
+        while position != -1 and position < end:
+            yield segment_lo + position
+            position = flags.find(1, position + 1)
+        index += 1
+
+
+def next_prime(x):
+    """
+    Finds the smallest prime greater than x
+    :param x: an integer
+    :return: the next prime
+    """
+    if x + 1 < SIEVE_LIMIT:
+        for p in primes_in_range(x + 1):
+            return p
+    lo = max(x + 1, SIEVE_LIMIT)
+    while True:
+        for n in _window_candidates(lo, lo + WINDOW_SIZE):
+            if is_prime(n):
+                return n
+        lo += WINDOW_SIZE
+
+
+def prev_prime(x):
+    """
+    Finds the largest prime less than x
+    :param x: an integer
+    :return: the previous prime, or None if x <= 2
+    """
+    hi = x
+    while hi > SIEVE_LIMIT:
+        lo = max(hi - WINDOW_SIZE, SIEVE_LIMIT)
+        for n in reversed(_window_candidates(lo, hi)):
+            if is_prime(n):
+                return n
+        hi = lo
+
+    if hi <= 2:
+        return None
+    index = (hi - 1) // SEGMENT_SIZE
+    while index >= 0:
+        segment_lo = index * SEGMENT_SIZE
+        position = sieve_segment(index).rfind(1, 0, hi - segment_lo)
+        if position != -1:
+            return segment_lo + position
+        index -= 1
+    return None
+
+
+@lru_cache(maxsize=CACHE_SEGMENTS)
+def sieve_segment(index):
+    """
+    Sieves the numbers [index * SEGMENT_SIZE, (index + 1) * SEGMENT_SIZE)
+    :param index: which segment
+    :return: bytes with a 1 at every position whose number is prime
+    """
+    lo = index * SEGMENT_SIZE
+    hi = lo + SEGMENT_SIZE
+    flags = bytearray([1]) * SEGMENT_SIZE
+    if lo == 0:
+        flags[0:2] = b"\x00\x00"
+    for p in _base_primes_upto(math.isqrt(hi - 1)):
+        start = max(p * p, -(-lo // p) * p)  # first multiple of p to cross off, p itself stays prime
+        if start >= hi:
+            continue
+        flags[start - lo::p] = bytes(len(range(start - lo, SEGMENT_SIZE, p)))
+    return bytes(flags)
+
+
+def _base_primes_upto(limit):
+    """
+    The sieving primes for a segment, grown by doubling so the list is rebuilt only a few times
+    :param limit: largest prime needed
+    :return: list of the primes up to limit
+    """
+    global _base_primes, _base_limit
+    if limit > _base_limit:
+        _base_limit = max(limit, 2 * _base_limit)
+        _base_primes = _primes_below(_base_limit + 1)
+    end = len(_base_primes) if limit == _base_limit else bisect_right(_base_primes, limit)
+    return _base_primes[:end]
+
+
+def _window_candidates(lo, hi):
+    """
+    Crosses off multiples of SMALL_PRIMES in [lo, hi), for numbers too big to sieve completely
+    :param lo: lower bound, inclusive, bigger than every small prime
+    :param hi: upper bound, exclusive
+    :return: list of the numbers in the window with no small prime factor
+    """
+    flags = bytearray([1]) * (hi - lo)
+    for p in SMALL_PRIMES:
+        start = -(-lo // p) * p
+        flags[start - lo::p] = bytes(len(range(start - lo, hi - lo, p)))
+    return [lo + i for i, flag in enumerate(flags) if flag]
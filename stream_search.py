@@ -0,0 +1,110 @@
+from array import array
+
+from z_algorithm import as_indexable, z_values
+
+
+CHUNK_SIZE = 1 << 20  # bytes read at a time by read_chunks
+
+
+class StreamMatcher:
+    """
+    Exact pattern search over text that arrives in chunks, e.g. from a file, socket or generator.
+    The pattern is preprocessed once into a failure function (built from its z-values) and only the automaton
+    state is carried between chunks, so memory is O(m) however long the text is and matches that cross a chunk
+    boundary are still found.
+    """
+    def __init__(self, pattern):
+        """
+        :param pattern: a non empty str or bytes-like pattern, the text chunks must be the same kind
+        """
+        if len(pattern) == 0:
+            raise ValueError("pattern must not be empty")
+        self.pattern = pattern
+        self._pattern = as_indexable(pattern)
+        self.failure = failure_function(pattern)
+        self.state = 0  # length of the longest pattern prefix that ends the text seen so far
+        self.offset = 0  # number of text items seen so far
+
+    def reset(self):
+        """
+        Forgets all text fed so far
+        :return: None
+        """
+        self.state = 0
+        self.offset = 0
+
+    def feed(self, chunk):
+        """
+        Consumes the next piece of text, all of it, before returning
+        :param chunk: str or bytes-like chunk of text
+        :return: list of the offsets (from the start of the stream) of matches ending in this chunk
+        """
+        pattern = self._pattern
+        failure = self.failure
+        m = len(pattern)
+        state = self.state
+        start = self.offset - m + 1  # a match ending at chunk index i starts at start + i
+        matches = []
+        for i, char in enumerate(as_indexable(chunk)):
+            while state > 0 and pattern[state] != char:
+                state = failure[state - 1]
+            if pattern[state] == char:
+                state += 1
+            if state == m:
+                matches.append(start + i)
+                state = failure[m - 1]
+        self.state = state
+        self.offset += len(chunk)
+        return matches
+
+    def search(self, chunks):
+        """
+        Lazily searches a whole stream
+        :param chunks: an iterable of text chunks
+        :return: a generator of match offsets in increasing order
+        """
+        for chunk in chunks:
+            yield from self.feed(chunk)
+
+
+def stream_search(pattern, chunks):
+    """
+    Finds every occurrence of pattern in a stream of text chunks
+    :param pattern: a non empty str or bytes-like pattern
+    :param chunks: an iterable of text chunks of the same kind as pattern
+    :return: a generator of match offsets in increasing order
+    """
+    return StreamMatcher(pattern).search(chunks)
+
+
+def read_chunks(file_object, chunk_size=CHUNK_SIZE):
+    """
+    Reads a file object in fixed size pieces
+    :param file_object: an open file, socket file or anything with read(size)
+    :param chunk_size: how much to read at a time
+    :return: a generator of the chunks
+    """
+    while True:
+        chunk = file_object.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def failure_function(pattern):
+    """
+    KMP failure function from the z-values: failure[j] is the length of the longest proper border of pattern[:j+1]
+    Each z-box [i, i + z[i]) gives the borders ending inside it, walking it backwards stops at the first position
+    an earlier (longer) box already filled, so the whole pass is O(m).
+    :param pattern: a str or bytes-like pattern
+    :return: array('i') of length len(pattern)
+    """
+    m = len(pattern)
+    z_array = z_values(pattern)
+    failure = array('i', [0]) * m
+    for i in range(1, m):
+        for j in range(z_array[i] - 1, -1, -1):
+            if failure[i + j] > 0:
+                break
+            failure[i + j] = j + 1
+    return failure
@@ -0,0 +1,275 @@
+"""
+Benchmarks for the exact string search engines in string_search on seeded synthetic corpora.
+
+Run e.g.  python string_benchmark.py --corpora dna english --sizes 10000 100000 --output results.json
+Every (corpus, size, pattern length, periodicity, engine) gets one record with the search time and match count.
+The suffix_tree engine also reports its build time separately, since a kept tree only pays that once.
+--calibrate prints the thresholds string_search.choose_engine should use, derived from the results, e.g.
+    python string_benchmark.py --sizes 10000 100000 1000000 --lengths 2 3 4 6 8 12 16 32 64 256 \
+        --engines boyer_moore z --calibrate
+"""
+import argparse
+import gc
+import json
+import random
+import time
+
+from string_search import ENGINES, SMALL_TEXT
+from ukkonens_alogrithm import SuffixTree
+
+
+ALPHABET_SAMPLE_SIZE = 100000  # characters generated to measure each corpus's alphabet in calibrate
+CALIBRATION_REPEATS = 5  # fewest runs per measurement calibrate accepts, one run is mostly timing noise
+CALIBRATION_MARGIN = 1.3  # boyer moore must be this many times faster than the z scan before calibrate picks it
+
+WORDS = ("the of and to in is that it was for on are with as his they be at one have this from or had by word but "
+         "what some we can out other were all there when up use your how said an each she which do their time if will "
+         "way about many then them write would like so these her long make thing see him two has look more day could "
+         "go come did number sound no most people my over know water than call first who may down side been now find "
+         "any new work part take get place made live where after back little only round man year came show every good "
+         "me give our under name very through just form sentence great think say help low line differ turn cause much "
+         "mean before move right boy old too same tell does set three want air well also play small end put home read "
+         "hand port large spell add even land here must big high such follow act why ask men change went light kind "
+         "off need house picture try us again animal point mother world near build self earth father").split()
+
+
+def dna_corpus(n, seed):
+    """
+    :param n: length of the text
+    :param seed: seed for the generator
+    :return: n random bytes over acgt
+    """
+    rng = random.Random(seed)
+    return bytes(rng.choice(b"acgt") for _ in range(n))
+
+
+def english_corpus(n, seed):
+    """
+    Words from a fixed vocabulary with a zipf like frequency, so common words recur the way they do in prose
+    :param n: length of the text
+    :param seed: seed for the generator
+    :return: a str of n characters
+    """
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(WORDS) + 1)]
+    pieces = []
+    length = 0
+    while length < n:
+        for word in rng.choices(WORDS, weights, k=1024):
+            pieces.append(word)
+            length += len(word) + 1
+    return " ".join(pieces)[:n]
+
+
+def binary_corpus(n, seed):
+    """
+    :param n: length of the text
+    :param seed: seed for the generator
+    :return: n uniformly random bytes
+    """
+    rng = random.Random(seed)
+    return bytes(rng.getrandbits(8) for _ in range(n))
+
+
+CORPORA = {
+    "dna": dna_corpus,
+    "english": english_corpus,
+    "binary": binary_corpus,
+}
+
+
+def periodic_text(text, seed, period=3, mutation_rate=0.01):
+    """
+    Text made of one short unit repeated with rare mutations, the bad case for scans that backtrack
+    :param text: a corpus text, the unit and the mutations are drawn from its characters
+    :param seed: seed for the generator
+    :param period: length of the repeated unit
+    :param mutation_rate: chance each character is replaced by a random one
+    :return: (text of the same kind and length, the unit)
+    """
+    rng = random.Random(seed)
+    alphabet = sorted(set(text))
+    unit = [rng.choice(alphabet) for _ in range(period)]
+    items = [unit[i % period] if rng.random() >= mutation_rate else rng.choice(alphabet) for i in range(len(text))]
+    if isinstance(text, str):
+        return "".join(items), "".join(unit)
+    return bytes(items), bytes(unit)
+
+
+def make_pattern(text, m, seed, unit=None):
+    """
+    :param text: the text to be searched
+    :param m: pattern length
+    :param seed: seed for the generator
+    :param unit: for periodic text, the repeated unit, the pattern is then the unit repeated to length m
+    :return: a pattern of length m, copied from a random place in text when there is no unit
+    """
+    if unit is not None:
+        return (unit * (m // len(unit) + 1))[:m]
+    rng = random.Random(seed)
+    start = rng.randrange(len(text) - m + 1)
+    return text[start:start + m]
+
+
+def time_engines(engines, text, pattern, repeats):
+    """
+    Times each engine on the same search, taking turns: every round runs each engine once, so a stretch when the
+    machine is slower falls on all of them rather than on whichever happened to be running
+    :param engines: keys of ENGINES
+    :param text: the text
+    :param pattern: the pattern
+    :param repeats: rounds, the fastest run of each engine is kept
+    :return: dictionary from engine to (seconds, matches)
+    """
+    timings = {}
+    for _ in range(repeats):
+        for engine in engines:
+            collecting = gc.isenabled()
+            gc.disable()  # like timeit, so a collection triggered by earlier work isn't charged to this run
+            try:
+                start = time.perf_counter()
+                matches = ENGINES[engine](text, pattern)
+                seconds = time.perf_counter() - start
+            finally:
+                if collecting:
+                    gc.enable()
+            if engine not in timings or seconds < timings[engine][0]:
+                timings[engine] = (seconds, matches)
+    return timings
+
+
+def time_suffix_tree(text, pattern, repeats):
+    """
+    Times building a SuffixTree of text and querying it, apart
+    :return: (build seconds, query seconds, matches)
+    """
+    if not isinstance(text, str):
+        text = text.decode("latin-1")
+        pattern = pattern.decode("latin-1")
+    text += chr(max(map(ord, text + pattern)) + 1)  # a terminator in neither text nor pattern
+    build = query = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        tree = SuffixTree(text)
+        built = time.perf_counter()
+        matches = tree.find_all(pattern)
+        finished = time.perf_counter()
+        if build is None or finished - start < build + query:
+            build = built - start
+            query = finished - built
+    return build, query, matches
+
+
+def run_benchmark(corpora, sizes, lengths, engines=tuple(ENGINES), seed=0, repeats=1, suffix_tree_limit=100000):
+    """
+    Benchmarks every engine on every corpus, size and pattern length, with both random and periodic patterns
+    :param corpora: names from CORPORA
+    :param sizes: text lengths to generate
+    :param lengths: pattern lengths to try
+    :param engines: keys of ENGINES to time
+    :param seed: base seed, the same seed always gives the same texts and patterns
+    :param repeats: runs per measurement, the fastest is kept, the engines take turns
+    :param suffix_tree_limit: the suffix_tree engine is skipped on longer texts
+    :return: a list of result dictionaries
+    """
+    results = []
+    for corpus in corpora:
+        for size in sizes:
+            base_text = CORPORA[corpus](size, seed)
+            for periodic in (False, True):
+                if periodic:
+                    text, unit = periodic_text(base_text, seed)
+                else:
+                    text, unit = base_text, None
+                for m in lengths:
+                    if m > size:
+                        continue
+                    pattern = make_pattern(text, m, seed + m, unit)
+                    timings = time_engines([engine for engine in engines if engine != "suffix_tree"], text, pattern,
+                                           repeats)
+                    expected = None
+                    for engine in engines:
+                        record = {"corpus": corpus, "size": size, "pattern_length": m, "periodic": periodic,
+                                  "engine": engine, "seed": seed, "repeats": repeats}
+                        if engine == "suffix_tree":
+                            if size > suffix_tree_limit:
+                                continue
+                            build, seconds, matches = time_suffix_tree(text, pattern, repeats)
+                            record["build_seconds"] = build
+                        else:
+                            seconds, matches = timings[engine]
+                        if expected is None:
+                            expected = matches
+                        elif matches != expected:
+                            raise AssertionError("%s disagrees on %s" % (engine, record))
+                        record["seconds"] = seconds
+                        record["matches"] = len(matches)
+                        results.append(record)
+    return results
+
+
+def calibrate(results, margin=CALIBRATION_MARGIN):
+    """
+    Derives string_search thresholds from benchmark results: for each corpus, the shortest pattern length from
+    which boyer moore beats the z scan by margin, comparing their total time over every text of at least
+    SMALL_TEXT characters, periodic or not, at that length and all longer ones
+    :param results: records from run_benchmark with the boyer_moore and z engines, timed over at least
+                    CALIBRATION_REPEATS runs
+    :param margin: how many times faster boyer moore has to be, so lengths where the two are close keep the z scan
+    :return: dictionary from corpus name to (alphabet size, shortest winning pattern length or None)
+    """
+    totals = {}  # (corpus, pattern length) -> engine -> seconds
+    for record in results:
+        if record.get("repeats", 1) < CALIBRATION_REPEATS:
+            raise ValueError("calibrate needs results timed over at least %d repeats" % CALIBRATION_REPEATS)
+        if record["engine"] in ("boyer_moore", "z") and record["size"] >= SMALL_TEXT:
+            engines = totals.setdefault((record["corpus"], record["pattern_length"]), {"boyer_moore": 0, "z": 0})
+            engines[record["engine"]] += record["seconds"]
+
+    thresholds = {}
+    for corpus in sorted({corpus for corpus, _ in totals}):
+        shortest = None
+        for m in sorted((m for name, m in totals if name == corpus), reverse=True):
+            engines = totals[corpus, m]
+            if engines["boyer_moore"] * margin > engines["z"]:
+                break
+            shortest = m  # walk down while boyer moore keeps winning
+        alphabet = len(set(CORPORA[corpus](ALPHABET_SAMPLE_SIZE, 0)))
+        thresholds[corpus] = (alphabet, shortest)
+    return thresholds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the string search engines on synthetic corpora")
+    parser.add_argument("--corpora", nargs="+", default=list(CORPORA), choices=list(CORPORA))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 100000, 1000000])
+    parser.add_argument("--lengths", nargs="+", type=int, default=[2, 4, 8, 16, 32, 64, 256])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int,
+                        help="runs per measurement, the fastest is kept, defaults to 1 or %d with --calibrate"
+                             % CALIBRATION_REPEATS)
+    parser.add_argument("--suffix-tree-limit", type=int, default=100000)
+    parser.add_argument("--calibrate", action="store_true", help="print thresholds for string_search instead")
+    parser.add_argument("--output", help="write the results here as json, otherwise print them")
+    args = parser.parse_args()
+    if args.repeats is None:
+        args.repeats = CALIBRATION_REPEATS if args.calibrate else 1
+    elif args.calibrate and args.repeats < CALIBRATION_REPEATS:
+        parser.error("--calibrate needs --repeats of at least %d" % CALIBRATION_REPEATS)
+
+    results = run_benchmark(args.corpora, args.sizes, args.lengths, args.engines, args.seed, args.repeats,
+                            args.suffix_tree_limit)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    elif not args.calibrate:
+        for record in results:
+            print(json.dumps(record))
+    if args.calibrate:
+        for corpus, (alphabet, shortest) in calibrate(results).items():
+            print(json.dumps({"corpus": corpus, "alphabet": alphabet, "boyer_moore_min_length": shortest}))
+
+
+if __name__ == "__main__":
+    main()
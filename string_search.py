@@ -0,0 +1,126 @@
+import mmap
+
+from boyer_moore import BoyerMoorePattern, compile as compile_pattern
+from stream_search import StreamMatcher
+from ukkonens_alogrithm import SuffixTree
+from z_algorithm import as_indexable
+
+
+# Thresholds for choose_engine, from string_benchmark.py --calibrate (pattern lengths 2 to 256, texts 10^4 to 10^6,
+# best of 5 runs, boyer moore has to be 1.3 times faster than the z scan)
+SMALL_TEXT = 4096  # below this many characters preprocessing isn't repaid, the z scan is used
+ALPHABET_SAMPLE = 4096  # text characters looked at to estimate the alphabet size
+# (largest alphabet, shortest pattern boyer moore wins or None if it never does)
+BOYER_MOORE_MIN_LENGTH = ((4, None), (64, 64), (None, 32))
+
+
+def search(text, pattern):
+    """
+    Finds every occurrence of pattern in text with whichever engine choose_engine expects to be fastest
+    :param text: a str, or a bytes-like text (bytes, bytearray, mmap, memoryview, array or numpy array)
+    :param pattern: a non empty pattern of the same kind as text
+    :return: list of the indexes where matches occur, overlapping matches included, in increasing order
+    """
+    return ENGINES[choose_engine(text, pattern)](text, pattern)
+
+
+def choose_engine(text, pattern):
+    """
+    Picks a search engine from the kind of text, the pattern length, the alphabet and the text size.
+    Texts with a native find use it, it is c code and beat every other engine in every benchmark. Otherwise short
+    texts get the z scan, and longer ones boyer moore once the pattern is long enough for the alphabet that its
+    shifts pay for its preprocessing.
+
+    :param text: the text to be searched
+    :param pattern: a non empty pattern
+    :return: a key of ENGINES
+    """
+    if len(pattern) == 0:
+        raise ValueError("pattern must not be empty")
+    if _has_find(text, pattern):
+        return "find"
+    if len(text) < SMALL_TEXT:
+        return "z"
+    alphabet = alphabet_size(text)
+    for largest, shortest in BOYER_MOORE_MIN_LENGTH:
+        if largest is None or alphabet <= largest:
+            return "boyer_moore" if shortest is not None and len(pattern) >= shortest else "z"
+
+
+def alphabet_size(text, sample=ALPHABET_SAMPLE):
+    """
+    Estimates the alphabet of text from its first characters
+    :param text: a str or bytes-like text
+    :param sample: how many characters to look at
+    :return: the number of distinct characters in the sample
+    """
+    return len(set(as_indexable(text)[:sample]))
+
+
+def find_search(text, pattern):
+    """
+    :param text: a str, bytes, bytearray or mmap
+    :param pattern: a non empty pattern of the same kind
+    :return: list of the match indexes from repeated text.find
+    """
+    matches = []
+    find = text.find
+    index = find(pattern)
+    while index >= 0:
+        matches.append(index)
+        index = find(pattern, index + 1)
+    return matches
+
+
+def boyer_moore_search(text, pattern):
+    """
+    :param text: a str or bytes-like text
+    :param pattern: a non empty pattern of the same kind
+    :return: list of the match indexes from boyer_moore, with the pattern cached by compile where it can be
+    """
+    if isinstance(pattern, (str, bytes, bytearray)):
+        matcher = compile_pattern(pattern)
+    else:
+        matcher = BoyerMoorePattern(as_indexable(pattern))
+    return list(matcher.finditer(as_indexable(text)))
+
+
+def z_search(text, pattern):
+    """
+    :param text: a str or bytes-like text
+    :param pattern: a non empty pattern of the same kind
+    :return: list of the match indexes from a scan with the failure function built from the z-values
+    """
+    return StreamMatcher(pattern).feed(text)
+
+
+def suffix_tree_search(text, pattern):
+    """
+    Builds a suffix tree of text and walks it. The build is O(n) but far slower than a scan, so this only pays off
+    when a SuffixTree is kept and queried many times, choose_engine never picks it for a single search.
+    :param text: a str or bytes-like text
+    :param pattern: a non empty pattern of the same kind
+    :return: list of the match indexes from SuffixTree.find_all
+    """
+    if not isinstance(text, str):
+        text = "".join(map(chr, as_indexable(text)))
+        pattern = "".join(map(chr, as_indexable(pattern)))
+    terminator = chr(max(map(ord, text + pattern)) + 1)  # larger than every character so it's in neither
+    return SuffixTree(text + terminator).find_all(pattern)
+
+
+ENGINES = {
+    "find": find_search,
+    "boyer_moore": boyer_moore_search,
+    "z": z_search,
+    "suffix_tree": suffix_tree_search,
+}
+
+
+def _has_find(text, pattern):
+    """
+    :return: True when text.find(pattern) works and gives the same indexes as the other engines
+    """
+    if isinstance(text, str):
+        return isinstance(pattern, str)
+    return isinstance(text, (bytes, bytearray, mmap.mmap)) and isinstance(pattern, (bytes, bytearray))
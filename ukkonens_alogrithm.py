@@ -1,82 +1,181 @@
+from array import array
+from bisect import bisect_left
 import random
 import time
 import sys
 
 
-class Edge:
+LEAF = -1  # edge_end value of a leaf edge, which ends at the tree's global end instead
+WIDE = 12  # children a node keeps in its sibling list before they move to a sorted wide index
+
+
+class SuffixTree:
     """
-    Edge class for use in the suffix tree
+    Suffix tree built with Ukkonen's algorithm, stored as parallel integer arrays indexed by node.
+    Node 0 is the root. Every other node v has one incoming edge, labelled string[edge_start[v] : end + 1] where
+    end is edge_end[v] for internal nodes and the shared global end for leaves, so extending every leaf at once is
+    a single assignment. Internal nodes have a suffix_link. A node's children form a first_child / next_sibling
+    list while there are fewer than WIDE of them, which covers most nodes on small alphabets. Wider nodes keep
+    them in a pair of arrays sorted by the code of their first character instead, found by bisection, so finding
+    a child is O(log sigma) whatever the alphabet.
+    That is a few ints per node rather than the objects, dictionaries and lists a node and edge each used to take.
     """
-    def __init__(self, interval, start, end=None):
+    def __init__(self, string=None):
         """
-        :param interval: an array of length 2, [x,y]. x is the index of string the edge represents, y is the end
-                         so for example, if string is 'abcd' and edge represents 'abc', interval would be [0,2]
-        :param start: the start node of the edge
-        :param end: the end node of the edge
+        :param string: if string is left blank the tree is initialised without running Ukkonnen. Otherwise run
         """
-        self.start_node = start
-        self.end_node = end
-        self.interval = interval
-
-    def set_end_node(self, node):
-        self.end_node = node
+        self.root = 0
+        self.string = string
+        self.is_text = isinstance(string, str)
+        self._reset(0)
+        if self.string is not None:
+            self.ukkonen(string)
 
-    def set_interval_end(self, end):
+    def _reset(self, size_hint):
         """
-        Sets the end value of the edge interval
-        :param end: the end index
+        Empties the tree down to just the root
+        :param size_hint: length of the string the tree is for, picks the width of the arrays
         :return: None
         """
-        start = self.interval[0]
-        self.interval = [start, end]
-
-    def get_interval_length(self):
-        start = self.interval[0]
-        end = self.interval[1]
-        return end - start + 1
-
-
-class Node:
-    """
-    Node class for the suffix tree
-    """
-    def __init__(self, name=None):
-        self.child_dict = {}  # A dictionary of edges between this node and its children, key is first letter in edge string
-        self.suffix_link = None
-        self.name = name
-
-    def set_sl(self, node):
-        self.suffix_link = node
+        typecode = 'i' if 2 * size_hint < 2**31 else 'q'
+        self.edge_start = array(typecode, [0])
+        self.edge_end = array(typecode, [0])
+        self.first_child = array(typecode, [-1])
+        self.next_sibling = array(typecode, [-1])
+        self.suffix_link = array(typecode, [0])
+        self.wide = {}  # node -> (sorted first character codes, children) for nodes with WIDE or more children
+        self.end = -1  # global end of every leaf edge
+        self.num_nodes = 1
 
-    def add_edge(self, edge, key):
-        self.child_dict[key] = edge
+    def _new_node(self, start, end):
+        """
+        :param start: index in string the incoming edge starts at
+        :param end: index its last character is at, or LEAF
+        :return: the new node, not yet attached to a parent
+        """
+        self.edge_start.append(start)
+        self.edge_end.append(end)
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        self.suffix_link.append(0)
+        return len(self.edge_start) - 1
+
+    def _child(self, node, char):
+        """
+        Gets the child of node whose edge begins with char
+        :param node: a node
+        :param char: a single character
+        :return: the child, or -1 if there is no path
+        """
+        index = self.wide.get(node)
+        if index is not None:
+            codes, children = index
+            code = ord(char) if self.is_text else char
+            i = bisect_left(codes, code)
+            if i < len(codes) and codes[i] == code:
+                return children[i]
+            return -1
+        string = self.string
+        child = self.first_child[node]
+        while child >= 0:  # at most WIDE - 1 siblings
+            if string[self.edge_start[child]] == char:
+                return child
+            child = self.next_sibling[child]
+        return -1
+
+    def _add_child(self, node, child):
+        """
+        Links child under node, moving node's children into a sorted wide index once it has WIDE of them
+        :param node: the parent
+        :param child: a node with no parent yet
+        :return: None
+        """
+        index = self.wide.get(node)
+        if index is not None:
+            codes, children = index
+            code = self._code(child)
+            i = bisect_left(codes, code)
+            codes.insert(i, code)
+            children.insert(i, child)
+            return
+        self.next_sibling[child] = self.first_child[node]
+        self.first_child[node] = child
+        count = 0
+        current = child
+        while current >= 0 and count < WIDE:
+            count += 1
+            current = self.next_sibling[current]
+        if count == WIDE:
+            children = sorted(self._children(node), key=self._code)
+            self.wide[node] = (array('I', map(self._code, children)), array(self.edge_start.typecode, children))
+            self.first_child[node] = -1
+
+    def _replace_child(self, node, old, new):
+        """
+        Puts new in old's place among node's children, they begin with the same character
+        :return: None
+        """
+        index = self.wide.get(node)
+        if index is not None:
+            codes, children = index
+            children[bisect_left(codes, self._code(new))] = new
+            return
+        self.next_sibling[new] = self.next_sibling[old]
+        if self.first_child[node] == old:
+            self.first_child[node] = new
+        else:
+            current = self.first_child[node]
+            while self.next_sibling[current] != old:
+                current = self.next_sibling[current]
+            self.next_sibling[current] = new
+        self.next_sibling[old] = -1
+
+    def _code(self, node):
+        """
+        :param node: a node other than the root
+        :return: the first character of node's edge as an int, what node is sorted on in its parent's wide index
+        """
+        char = self.string[self.edge_start[node]]
+        return ord(char) if self.is_text else char
 
-    def is_path(self, key):
+    def edge_interval(self, node):
         """
-        Gets the edge from a node that begins with key
-        :param key: a single character
-        :return:
+        :param node: a node other than the root
+        :return: [start, end], the indexes in string of the first and last character of the edge into node
         """
-        try:
-            edge = self.child_dict[key]
-            return edge
-        except KeyError:
-            return False  # No path exists
+        end = self.edge_end[node]
+        return [self.edge_start[node], self.end if end == LEAF else end]
 
+    def children(self, node):
+        """
+        :param node: a node
+        :return: list of node's children, in order of the first character of their edge
+        """
+        string = self.string
+        edge_start = self.edge_start
+        return sorted(self._children(node), key=lambda child: string[edge_start[child]])
 
-class SuffixTree:
-    def __init__(self, string=None):
+    def _children(self, node):
         """
-        :param string: if string is left blank the tree is initialised without running Ukkonnen. Otherwise run
+        :param node: a node
+        :return: an iterable of node's children in no particular order
         """
-        self.root = Node(0)
-        self.string = string
-        self.node_library = dict()
-        self.node_library[0] = self.root
-        self.num_nodes = 1
-        self.edge_list = []
-        if self.string is not None:
-            self.ukkonen(string)
+        index = self.wide.get(node)
+        if index is not None:
+            return list(index[1])
+        children = []
+        child = self.first_child[node]
+        while child >= 0:
+            children.append(child)
+            child = self.next_sibling[child]
+        return children
+
+    def is_leaf(self, node):
+        """
+        :param node: a node other than the root
+        :return: True if node is a leaf, so its edge runs to the global end
+        """
+        return self.edge_end[node] == LEAF
 
     def ukkonen(self, string):
         """
@@ -86,224 +185,99 @@ class SuffixTree:
         :return: None
         """
         self.string = string
+        self.is_text = isinstance(string, str)  # wide indexes sort str characters by code point
         m = len(string)
-        self.root.suffix_link = self.root
+        self._reset(m)
+        edge_start = self.edge_start
+        edge_end = self.edge_end
+        suffix_link = self.suffix_link
 
-        remaining = 0
+        remaining = 0  # suffixes still to be added explicitly
         active_node = self.root
-        active_edge = -1
-        active_length = 0
-        left_index = 0
-        end = m - 1  # Used for updating leaf nodes
-
-        most_recent_internal_node = None  # Use this for making suffix links
-
-        node_count = 1
-        node_library = {}
-        node_library[0] = self.root
+        active_edge = 0  # index in string of the first character of the edge we are on
+        active_length = 0  # how far along that edge we are, 0 means at active_node
 
         for i in range(m):
-            # begin phase i
+            # begin phase i, rule one extension: every leaf grows by one character through the global end
+            self.end = i
             remaining += 1
+            most_recent_internal_node = -1  # Use this for making suffix links
+            char = string[i]
 
             while remaining > 0:
-
-                char = string[i]
-
-                if active_length == 0:  # We are at a node in the tree
-
-                    if active_node.is_path(char) != False:
-
-                        # is a path for our character
-                        if active_node.is_path(char).get_interval_length() == 1:
-                            # we move along the edge to next node
-                            active_node = active_node.is_path(char).end_node
-                        else:
-                            active_edge = active_node.is_path(char).interval[0]  # Start index of edge here
-                            active_length += 1
-                        most_recent_internal_node = None  # Didn't create a new internal node so can't do suffix link
-                        break  # Rule three extension leads to break
-
-
-                    else:  # No path
-                        # this iteration is not
-                        edge = Edge([i, end], active_node)
-                        active_node.add_edge(edge, string[i])
-                        remaining -= 1  # b.c. we crated leaf node
-                        left_index += 1
-                        # Now find next place to start iteration
-                        if active_node != self.root:
-                            active_node = self.root
-
-                            active_edge = left_index  # this is an index to begin traversal from
-
-                            active_length = i - left_index
-
-                            while active_length > 0:
-                                if active_node.is_path(string[active_edge]):
-                                    # There is an edge that goes out of the root for our next back character
-                                    path_length = active_node.is_path(string[active_edge]).get_interval_length()
-                                    if path_length > active_length:
-                                        # active node is right.
-                                        # active length is right
-                                        # active edge is right
-                                        break
-
-                                    else:  # need to keep traversing to find position
-                                        # step along to next node
-                                        active_node = active_node.is_path(string[active_edge]).end_node
-                                        active_edge += path_length
-                                        active_length -= path_length
-                                else:
-                                    break
-
-                else:  # We are not at node and are instead in the middle of an edge with at least one character left
-
-                    active_position = active_node.is_path(string[active_edge]).interval[0] + active_length - 1
-
-                    if string[active_position + 1] == string[i]:  # Are characters the same
-                        most_recent_internal_node = None  # this extension is not a suffix link
-                        # yes we are going with rule 3 extension
+                if active_length == 0:
+                    active_edge = i
+                child = self._child(active_node, string[active_edge])
+
+                if child < 0:  # No path, so add a leaf here
+                    self._add_child(active_node, self._new_node(i, LEAF))
+                    if most_recent_internal_node >= 0:
+                        suffix_link[most_recent_internal_node] = active_node
+                        most_recent_internal_node = -1
+                else:
+                    end = i if edge_end[child] == LEAF else edge_end[child]
+                    path_length = end - edge_start[child] + 1
+                    if active_length >= path_length:  # skip count down to the next node
+                        active_node = child
+                        active_edge += path_length
+                        active_length -= path_length
+                        continue
+
+                    if string[edge_start[child] + active_length] == char:  # Rule three extension leads to break
+                        if most_recent_internal_node >= 0 and active_node != self.root:
+                            suffix_link[most_recent_internal_node] = active_node
+                            most_recent_internal_node = -1
                         active_length += 1
-
-                        if active_node.is_path(string[active_edge]).get_interval_length() == active_length:
-                            # We reached the end of edge
-                            # So we move along the edge to next node
-                            # print(active_node.name, active_node.is_path(string[active_edge]).end_node.name)
-                            active_node = active_node.is_path(string[active_edge]).end_node
-                            # print("!!!", active_node.name)
-                            active_edge = -1
-                            active_length = 0
-
-                        # most_recent_internal_node = None  # Didn't create a new internal node so can't do suffix link
-                        break  # Rule three extension leads to break
-
-
-                    else:  # We have a rule 2 extension
-                        # We need to create a new internal node and two new edges from it
-                        self.num_nodes += 1  # Added a new internal node
-
-                        new_node = Node(node_count)
-                        node_library[new_node.name] = new_node
-                        self.node_library[node_count] = new_node
-                        node_count += 1
-                        remaining -= 1  # We created a new leaf node
-                        left_index += 1
-
-                        if active_node.is_path(string[active_edge]).end_node != None:  # We are on a non leaf edge
-                            # print("we broke an edge")
-                            # We break the internal edge in half when we add a new internal node
-                            new_end = active_node.is_path(string[active_edge]).interval[1]
-                            end_node = active_node.is_path(string[active_edge]).end_node
-                            edge1 = Edge([active_position + 1, new_end], new_node)
-                            edge1.set_end_node(end_node)
-                            edge2 = Edge([i, end], new_node)
-                            new_node.add_edge(edge1, string[active_position + 1])
-                            new_node.add_edge(edge2, string[i])
-                            active_node.is_path(string[active_edge]).set_interval_end(
-                                active_position)  # Change old edge end from active node
-                            active_node.is_path(string[active_edge]).set_end_node(
-                                new_node)  # Add end node to the edge b.c. it's no
-                            self.edge_list.append(active_node.is_path(string[active_edge]))
-                            new_node.set_sl(self.root)
-
-                        else:  # on a leaf edge
-                            # print("on a leaf edge")
-                            edge1 = Edge([active_position + 1, end], new_node)
-                            edge2 = Edge([i, end], new_node)
-                            new_node.add_edge(edge1, string[active_position + 1])
-                            new_node.add_edge(edge2, string[i])
-                            new_node.set_sl(self.root)  # Set suffix link of new internal to root
-
-                            active_node.is_path(string[active_edge]).set_interval_end(
-                                active_position)  # Change old edge end from active node
-                            active_node.is_path(string[active_edge]).set_end_node(
-                                new_node)  # Add end node to the edge b.c. it's no
-                            self.edge_list.append(active_node.is_path(string[active_edge]))
-
-                        if most_recent_internal_node != None:  # Created a new internal node in next phase so make suffix link
-                            # print("made a link", most_recent_internal_node.name, new_node.name)
-                            most_recent_internal_node.suffix_link = new_node
-
-                        most_recent_internal_node = new_node  # Now change the most recent internal node
-
-                        # Now find next place to start iteration
-
-                        # print(active_node.name, active_node.suffix_link.name)
-
-                        # this is the edge we begin traversal from at the root
-                        if active_node.suffix_link == self.root:  # Are we moving to the root?
-                            active_length = i - left_index
-                            active_edge = left_index
-                        active_node = active_node.suffix_link
-                        # print(active_length, i, left_index, active_node.name)
-                        while active_length > 0:  # if both are the same then we are meant to be at the root
-
-                            path_length = active_node.is_path(string[active_edge]).get_interval_length()
-                            if path_length > active_length:
-                                # active node is right.
-                                # active length is right
-                                # active edge is right
-                                break
-
-                            elif active_length == path_length:  # need to keep traversing to find position
-                                # our new start position is the next node
-                                active_node = active_node.is_path(string[active_edge]).end_node
-                                active_edge += path_length
-                                active_length -= path_length
-                            else:  # path length is bigger
-                                active_node = active_node.is_path(string[active_edge]).end_node
-                                active_edge += path_length
-                                active_length -= path_length
-                        # print(active_edge, active_length)
-
-                # print("node list", self.node_library)
-                # if i - left_index == 0:  # we finished a phase
-                #
-                #     most_recent_internal_node = None
+                        break
+
+                    # rule two extension in the middle of an edge, split it with a new internal node
+                    split = self._new_node(edge_start[child], edge_start[child] + active_length - 1)
+                    self.num_nodes += 1
+                    self._replace_child(active_node, child, split)
+                    edge_start[child] += active_length
+                    self._add_child(split, child)
+                    self._add_child(split, self._new_node(i, LEAF))
+                    if most_recent_internal_node >= 0:  # Created a new internal node in this phase so make suffix link
+                        suffix_link[most_recent_internal_node] = split
+                    most_recent_internal_node = split  # new internal nodes link to the root until told otherwise
+
+                remaining -= 1
+                # Now find next place to start iteration
+                if active_node == self.root and active_length > 0:
+                    active_length -= 1
+                    active_edge = i - remaining + 1
+                elif active_node != self.root:
+                    active_node = suffix_link[active_node]
+        self.end = m - 1
 
     def get_suffixs(self):
         """
-        This function starts the recursive traversal of the tree
+        This function starts the traversal of the tree
         :return: suffix_array, an array of all the suffixes in the tree
         """
-        string = ""
         suffix_array = []
-        node = self.root
-        self.get_suffix_aux(string, node, suffix_array)
+        self.get_suffix_aux("", self.root, suffix_array)
         return suffix_array
 
     def get_suffix_aux(self, in_string, node, suffix_array):
         """
-        Recursively traverses through tree to get all the suffixes as strings
+        Traverses the tree below node depth first, in alphabetical order, to get all the suffixes as strings.
+        Uses an explicit stack so deep trees don't hit the recursion limit.
 
         :param in_string: string of the current suffix we are building
         :param node: the node we want to explore now
         :param suffix_array: an array of the suffixes we have found so far
         :return: None
         """
-        keys = node.child_dict.keys()
-        sorted(keys)
-
-        for x in keys:  # for all keys in dict
-            new_string = ""
-            for i in range(len(in_string)):
-                new_string += in_string[i]
-            edge = node.child_dict[x]
-            # node_string = ""
-            # for i in range(len(node_name)):
-            #     node_string += node_name[i]
-            inter = edge.interval
-            start = int(inter[0])
-            end = int(inter[1])
-            for i in range(start, end + 1):
-                new_string += self.string[i]
-
-            if end + 1 != len(self.string):
-                next_node = edge.end_node
-                self.get_suffix_aux(new_string, next_node, suffix_array)
-            else:
+        stack = [(child, in_string) for child in reversed(self.children(node))]
+        while stack:
+            node, in_string = stack.pop()
+            start, end = self.edge_interval(node)
+            new_string = in_string + self.string[start:end + 1]
+            if self.is_leaf(node):
                 suffix_array.append(new_string)
+            else:
+                stack.extend((child, new_string) for child in reversed(self.children(node)))
 
     def get_suffix_interval(self):
         """
@@ -314,8 +288,7 @@ class SuffixTree:
         :return: An array with the lengths of suffixes as they would be in alphabetical order
         """
         suffix_array = []
-        node = self.root
-        self.get_suffix_interval_aux(0, node, suffix_array)
+        self.get_suffix_interval_aux(0, self.root, suffix_array)
         return suffix_array
 
     def get_suffix_interval_aux(self, length, node, suffix_array):
@@ -328,22 +301,15 @@ class SuffixTree:
         :param suffix_array: an array of the lengths of suffixes found so far
         :return: None
         """
-        key_array = list(node.child_dict.keys())
-        key_array = sorted(key_array)
-
-        for x in key_array:  # for all keys in dict
-            new_len = length
-            edge = node.child_dict[x]
-            inter = edge.interval
-            start = int(inter[0])
-            end = int(inter[1])
-            new_len += end - start + 1
-
-            if end + 1 != len(self.string):
-                next_node = edge.end_node
-                self.get_suffix_interval_aux(new_len, next_node, suffix_array)
-            else:
+        stack = [(child, length) for child in reversed(self.children(node))]
+        while stack:
+            node, length = stack.pop()
+            start, end = self.edge_interval(node)
+            new_len = length + end - start + 1
+            if self.is_leaf(node):
                 suffix_array.append(new_len)
+            else:
+                stack.extend((child, new_len) for child in reversed(self.children(node)))
 
     def get_num_nodes(self):
         """
@@ -352,6 +318,44 @@ class SuffixTree:
         """
         return self.num_nodes
 
+    def find_all(self, pattern):
+        """
+        Finds every occurrence of pattern by walking down from the root along pattern, then collecting the leaves
+        below where the walk stopped. The string should end with a unique terminator so every suffix is a leaf.
+
+        :param pattern: a non empty string
+        :return: list of the indexes where pattern occurs in the string, in increasing order
+        """
+        m = len(pattern)
+        node = self.root
+        depth = 0  # length of the path from the root to node
+        while True:
+            child = self._child(node, pattern[depth])
+            if child < 0:
+                return []
+            start, end = self.edge_interval(child)
+            length = end - start + 1
+            for j in range(1, min(length, m - depth)):
+                if self.string[start + j] != pattern[depth + j]:
+                    return []
+            if depth + length >= m:  # pattern ends on this edge
+                break
+            if self.is_leaf(child):  # the pattern runs past the end of the string
+                return []
+            depth += length
+            node = child
+
+        matches = []
+        stack = [(child, depth)]  # nodes below the end of the pattern, with the path length above their edge
+        while stack:
+            node, depth = stack.pop()
+            if self.is_leaf(node):  # the suffix starts depth characters before its edge
+                matches.append(self.edge_start[node] - depth)
+            else:
+                below = depth + self.edge_end[node] - self.edge_start[node] + 1
+                stack.extend((child, below) for child in self._children(node))
+        matches.sort()
+        return matches
 
     def show_edges(self, node):
         """
@@ -360,31 +364,22 @@ class SuffixTree:
         :param node: the node to be examined
         """
         print("new")
-        print(node.name)
-        for x in node.child_dict:  # for all keys in dict
-            print(x, node.is_path(x).interval)
-
-        for x in node.child_dict:  # for all keys in dict
-
-            edge = node.child_dict[x]
+        print(node)
+        for child in self.children(node):
+            print(self.string[self.edge_start[child]], self.edge_interval(child))
 
-            if edge.end_node != None:
-                new_node = edge.end_node
+        for child in self.children(node):
+            if not self.is_leaf(child):
+                self.show_edges(child)
 
-                self.show_edges(new_node)
-                
-     def computeBWT(self):
+    def computeBWT(self):
         """
         Computes the BWT of the self.string
         :return: bwt_string, the string of the Burrows-Wheeler transform
         """
-        bwt_string = ""
         suf_array = self.get_suffix_interval()
         n = len(self.string)
-        for suf_len in suf_array:
-            # each item is the length of a suffix
-            # We know the character in the final column of the BWT table will be the character in the string before the
-            # first character in the suffix
-            char = self.string[n - suf_len - 1]
-            bwt_string += char
-        return bwt_string
+        # each item is the length of a suffix
+        # We know the character in the final column of the BWT table will be the character in the string before the
+        # first character in the suffix
+        return "".join([self.string[n - suf_len - 1] for suf_len in suf_array])
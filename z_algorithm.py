@@ -1,66 +1,69 @@
+from array import array
+
+
 def z_algorithm(pattern):
     """
     Computes the the z-values for an input pattern
     :param string: a string to compute the z_values assumed longer than 2
-    :return: z_values of string
+    :return: z_values of string as a list, with None in position 0
     """
-    string = pattern
-    if len(string) <= 1:
+    if len(pattern) <= 1:
         return[1]
+    z_list = z_values(pattern).tolist()
+    z_list[0] = None
+    return z_list
 
-    #first Z2
-    z_array = [0]* len(string)
-    z_array[0] = None
 
-    r = 0
-    l = 0
-    i = 0
-    while string[i] == string[1+i]:
-        i += 1
-        if i+1 >= len(string):
-            break
+def z_values(sequence, out=None):
+    """
+    Computes the z-values of a sequence without copying it.
+    z[i] is the length of the longest common prefix of sequence and sequence[i:], so z[0] = len(sequence).
 
-    if i > 0:
-        z_array[1] = i
-        l = 1
-        r = i
+    :param sequence: a str, bytes, bytearray, memoryview, mmap or 1 dimensional numpy array of integer tokens
+    :param out: optional preallocated int32/int64 array (array.array, numpy array or memoryview) of at least
+                len(sequence) items to write the z-values into
+    :return: out, or a new array('i') (array('q') for sequences of 2^31 items or more) holding the z-values
+    """
+    string = as_indexable(sequence)
+    n = len(string)
+    if out is None:
+        out = array('i' if n < 2**31 else 'q', [0]) * n
+    elif len(out) < n:
+        raise ValueError("out has room for %d z-values, %d are needed" % (len(out), n))
+    if n == 0:
+        return out
 
-    k = 2
-    while k < len(string):
-        if k > r:
+    z_array = out
+    z_array[0] = n
+    l = 0
+    r = 0  # [l, r) is the rightmost z-box found so far
+    for k in range(1, n):
+        if k < r:  # we are in the z-box, so start from what the box's prefix already tells us
+            i = min(r - k, int(z_array[k - l]))
+        else:
             i = 0
-            while string[i] == string[i + k]:
-                i += 1
-                if i+k >= len(string):
-                    break
+        while k + i < n and string[i] == string[k + i]:
+            i += 1
+        z_array[k] = i
+        if k + i > r:
+            l = k
+            r = k + i
+    return out
 
-            z_array[k] = i
-            if i > 0:
-                l = k
-                r = k + i - 1
 
-        elif k <= r:    #we are in the z-box
-            if z_array[k-l] < r - k + 1:
-                z_array[k] = z_array[k-l]
-
-            else:# z_array[k-l] >= r - k + 1
-                if r+1 < len(string):       #We can look for letters after with z_box
-                    i = 0
-                    while string[r - k + i + 1] == string[r + i + 1]:
-                        i += 1
-                        if i + r + 1 >= len(string):
-                            break
-
-                    #we have i matches after
-                    if i > 0:
-                        z_array[k] = r - k + 1 + i
-                        l = k
-                        r = r + i
-                    else:
-                        z_array[k] = r - k + 1
-
-                else: #we have to have that z_array[k] = r-k+1
-                    z_array[k] = r-k+1
-
-        k += 1
-    return z_array
+def as_indexable(sequence):
+    """
+    Gets a zero copy view of sequence whose items compare as ints (or characters for str)
+    :param sequence: a str, bytes, bytearray, memoryview, mmap or 1 dimensional numpy array
+    :return: the sequence itself for str, otherwise a memoryview of it when it has a native format
+    """
+    if isinstance(sequence, str):
+        return sequence
+    try:
+        view = memoryview(sequence)
+    except TypeError:  # not a buffer, index it directly
+        return sequence
+    if view.ndim != 1 or view.format.lstrip("@") not in set("bBhHiIlLqQ"):
+        view.release()
+        return sequence  # e.g. non native byte order, only the object itself knows how to index it
+    return view